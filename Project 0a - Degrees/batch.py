@@ -0,0 +1,167 @@
+import argparse
+import csv
+import functools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Answer many degrees of separation queries at once.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("queries", nargs="?", default="-",
+                        help="CSV file of source,target name or id pairs "
+                             "(default: standard input)")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph in compact integer arrays")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load the compact graph from a binary snapshot")
+    parser.add_argument("--parallel", action="store_true",
+                        help="parse the CSV files on every core")
+    parser.add_argument("--method", choices=sorted(degrees.SEARCHES),
+                        default="bfs")
+    parser.add_argument("--landmarks", type=int, default=degrees.LANDMARKS,
+                        help="number of landmarks for the alt search")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(),
+                        help="number of worker processes")
+    args = parser.parse_args()
+    if args.method == "cached" and not (
+        args.compact or args.snapshot or args.parallel
+    ):
+        parser.error("--method cached needs --compact, --snapshot "
+                     "or --parallel")
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory, compact=args.compact,
+                      use_snapshot=args.snapshot, parallel=args.parallel,
+                      progress=lambda message: print(message, file=sys.stderr))
+    print("Data loaded.", file=sys.stderr)
+
+    # Precompute landmarks and the halves index for name suggestions once,
+    # before workers fork, rather than per worker
+    if args.method == "alt":
+        degrees.build_landmarks(args.landmarks)
+    degrees.name_index.build_halves()
+
+    if args.queries == "-":
+        run_batch(sys.stdin, sys.stdout, args.workers, args.method)
+    else:
+        with open(args.queries, encoding="utf-8") as f:
+            run_batch(f, sys.stdout, args.workers, args.method)
+
+
+def run_batch(lines, output, workers=None, method="bfs", chunksize=16):
+    """
+    Answers every (source, target) pair read from `lines`, writing one
+    JSON object per pair to `output` in input order.
+
+    Queries are fanned out to forked worker processes, which share the
+    already loaded graph copy-on-write instead of receiving it per task.
+    """
+    queries = read_queries(lines)
+    answer = functools.partial(answer_query, method=method)
+
+    # Without fork, workers would have to reload the data themselves
+    if workers == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        _write_results(map(answer, queries), output)
+        return
+
+    with multiprocessing.get_context("fork").Pool(workers) as pool:
+        _write_results(pool.imap(answer, queries, chunksize), output)
+
+
+def _write_results(results, output):
+    """
+    Streams results to `output` as JSON lines as soon as each is ready.
+    """
+    for result in results:
+        output.write(json.dumps(result) + "\n")
+        output.flush()
+
+
+def read_queries(lines):
+    """
+    Yields (source, target) pairs from CSV lines, skipping blank lines.
+    A malformed line yields its error result instead, so that it is
+    answered with an error like any other failed query.
+    """
+    reader = csv.reader(lines)
+    for row in reader:
+        if not row:
+            continue
+        if len(row) != 2:
+            yield {"line": reader.line_num, "row": row,
+                   "error": f"expected source,target but got {row}"}
+            continue
+        yield row[0].strip(), row[1].strip()
+
+
+def answer_query(query, method="bfs"):
+    """
+    Returns a JSON-serializable answer for one (source, target) query,
+    where each side is a person id or an unambiguous name, or the error
+    result read_queries yielded for a malformed line.
+    """
+    if isinstance(query, dict):
+        return query
+    source, target = query
+    result = {"source": source, "target": target}
+
+    try:
+        source_id = resolve_person(source)
+        target_id = resolve_person(target)
+    except LookupError as e:
+        result["error"] = str(e)
+        return result
+
+    start = time.perf_counter()
+    if source_id == target_id:
+        path = []
+    else:
+        path = degrees.shortest_path(source_id, target_id, method=method)
+    result["seconds"] = time.perf_counter() - start
+
+    result["source_id"] = source_id
+    result["target_id"] = target_id
+    if path is None:
+        result["degrees"] = None
+        result["path"] = None
+    else:
+        result["degrees"] = len(path)
+        result["path"] = [{"movie_id": movie_id, "person_id": person_id}
+                          for movie_id, person_id in path]
+    return result
+
+
+def resolve_person(value):
+    """
+    Returns the person id for an id or name, without prompting.
+    Raises LookupError if there is no such person or the name is ambiguous.
+    """
+    if value in degrees.people:
+        return value
+    person_ids = degrees.names.get(value.lower(), set())
+    if len(person_ids) == 0:
+        suggestions = ", ".join(
+            degrees.people[min(degrees.names[match])]["name"]
+            for _, match in degrees.name_index.fuzzy(value, limit=3))
+        if suggestions:
+            raise LookupError(
+                f"person not found: {value} (did you mean {suggestions}?)")
+        raise LookupError(f"person not found: {value}")
+    elif len(person_ids) > 1:
+        candidates = ", ".join(
+            f"{person_id} (born {degrees.people[person_id]['birth']})"
+            for person_id in sorted(person_ids)
+        )
+        raise LookupError(f"ambiguous name {value}: {candidates}")
+    return next(iter(person_ids))
+
+
+if __name__ == "__main__":
+    main()
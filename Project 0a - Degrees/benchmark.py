@@ -0,0 +1,210 @@
+import argparse
+import json
+import math
+import random
+import subprocess
+import sys
+import time
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+import degrees
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Measure Degrees load time, memory and query latency.")
+    parser.add_argument("directory")
+    parser.add_argument("--queries", type=int, default=200,
+                        help="number of random person pairs to search")
+    parser.add_argument("--methods", default="bfs",
+                        help="comma-separated search methods to measure")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph in compact integer arrays")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load the compact graph from a binary snapshot")
+    parser.add_argument("--parallel", action="store_true",
+                        help="parse the CSV files on every core")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output",
+                        help="append the report as a JSON line to this file")
+    args = parser.parse_args()
+
+    methods = args.methods.split(",")
+    for method in methods:
+        if method not in degrees.SEARCHES:
+            parser.error(f"unknown method: {method}")
+    if "cached" in methods and not (
+        args.compact or args.snapshot or args.parallel
+    ):
+        parser.error("method cached needs --compact, --snapshot "
+                     "or --parallel")
+
+    report = run(args.directory, methods, args.queries, args.compact,
+                 args.snapshot, args.parallel, args.seed)
+    print_report(report)
+    if args.output:
+        with open(args.output, "a", encoding="utf-8") as f:
+            f.write(json.dumps(report) + "\n")
+
+
+def run(directory, methods, queries, compact=False, use_snapshot=False,
+        parallel=False, seed=0):
+    """
+    Loads the data in `directory`, then times `queries` random
+    shortest-path queries with each method. Returns a report dictionary.
+    """
+    report = {
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _revision(),
+        "directory": directory,
+        "compact": compact,
+        "snapshot": use_snapshot,
+        "parallel": parallel
+    }
+
+    start = time.perf_counter()
+    degrees.load_data(directory, compact=compact, use_snapshot=use_snapshot,
+                      parallel=parallel)
+    report["load_seconds"] = time.perf_counter() - start
+    report["load_peak_rss_mb"] = peak_rss_mb()
+    report["people"] = len(degrees.people)
+    report["movies"] = len(degrees.movies)
+
+    rng = random.Random(seed)
+    person_ids = list(degrees.people)
+    pairs = [tuple(rng.sample(person_ids, 2)) for _ in range(queries)]
+
+    report["methods"] = {}
+    for method in methods:
+        report["methods"][method] = measure(method, pairs)
+    report["peak_rss_mb"] = peak_rss_mb()
+    return report
+
+
+def measure(method, pairs):
+    """
+    Runs every (source, target) pair with the given search method and
+    returns latency and nodes-expanded percentiles.
+
+    Nodes are counted through the neighbors callback, so methods that
+    search their own structures (cached) report no counts.
+    """
+    result = {}
+    if method == "alt":
+        # Time landmark precomputation apart from the queries
+        start = time.perf_counter()
+        degrees.build_landmarks()
+        result["build_seconds"] = time.perf_counter() - start
+
+    latencies = []
+    expanded = []
+    connected = 0
+    for source, target in pairs:
+        counter = _Counter(degrees.graph.neighbors if degrees.graph is not None
+                           else degrees._neighbors)
+        if degrees.graph is not None:
+            source = degrees.graph.person_index[source]
+            target = degrees.graph.person_index[target]
+
+        start = time.perf_counter()
+        path = degrees.SEARCHES[method](source, target, counter)
+        latencies.append(time.perf_counter() - start)
+
+        if counter.calls:
+            expanded.append(counter.calls)
+        if path is not None:
+            connected += 1
+
+    result.update({
+        "queries": len(pairs),
+        "connected": connected,
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "mean_ms": sum(latencies) / len(latencies) * 1000
+    })
+    if expanded:
+        result["p50_expanded"] = percentile(expanded, 50)
+        result["p99_expanded"] = percentile(expanded, 99)
+        result["mean_expanded"] = sum(expanded) / len(expanded)
+    return result
+
+
+def print_report(report):
+    """
+    Prints a benchmark report in human-readable form.
+    """
+    print(f"Data: {report['directory']} ({report['people']} people, "
+          f"{report['movies']} movies)")
+    print(f"Load: {report['load_seconds']:.2f}s, "
+          f"peak RSS {_megabytes(report['load_peak_rss_mb'])}")
+    for method, result in report["methods"].items():
+        line = (f"{method}: p50 {result['p50_ms']:.2f} ms, "
+                f"p99 {result['p99_ms']:.2f} ms")
+        if "p50_expanded" in result:
+            line += (f", expanded p50 {result['p50_expanded']}"
+                     f" p99 {result['p99_expanded']}")
+        print(f"{line} ({result['connected']}/{result['queries']} connected)")
+    print(f"Peak RSS: {_megabytes(report['peak_rss_mb'])}")
+
+
+def percentile(values, p):
+    """
+    Returns the p-th percentile of values, by nearest rank.
+    """
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, math.ceil(p / 100 * len(ordered)) - 1)
+    return ordered[rank]
+
+
+def peak_rss_mb():
+    """
+    Returns the peak resident set size of this process in megabytes,
+    or None where the resource module is unavailable.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    if sys.platform == "darwin":
+        return peak / (1024 * 1024)
+    return peak / 1024
+
+
+def _megabytes(value):
+    return "unknown" if value is None else f"{value:.1f} MB"
+
+
+def _revision():
+    """
+    Returns the current git revision, if any, to tag the report.
+    """
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"],
+                              capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class _Counter():
+    """
+    Wraps a neighbors function, counting how many people it expands.
+    """
+
+    def __init__(self, neighbors):
+        self.neighbors = neighbors
+        self.calls = 0
+
+    def __call__(self, person):
+        self.calls += 1
+        return self.neighbors(person)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+from array import array
+from collections import OrderedDict
+
+# Default memory budget for cached trees, in bytes
+MAX_BYTES = 256 * 1024 * 1024
+
+# Parent entry for people the tree does not reach
+UNREACHED = -1
+
+
+class TreeCache():
+    """
+    Least-recently-used cache of complete single-source breadth-first
+    search trees over a compact Graph.
+
+    Each tree is a pair of int32 arrays indexed by dense person index:
+    the parent person on a shortest path back to the source, and the
+    movie linking the two. With a cached tree, any target is answered
+    by following parents, in time proportional to the path length.
+    """
+
+    def __init__(self, graph, max_bytes=MAX_BYTES):
+        self.graph = graph
+        self.max_bytes = max_bytes
+        self.trees = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def __contains__(self, source):
+        return source in self.trees
+
+    def __len__(self):
+        return len(self.trees)
+
+    def nbytes(self):
+        """
+        Returns the memory held by cached trees, in bytes.
+        """
+        return sum(parents.itemsize * len(parents) * 2
+                   for parents, _ in self.trees.values())
+
+    def stats(self):
+        """
+        Returns a dictionary of cache counters.
+        """
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "trees": len(self.trees),
+            "bytes": self.nbytes()
+        }
+
+    def tree(self, source):
+        """
+        Returns the (parents, movies) arrays of the BFS tree rooted at
+        the given person index, searching and caching it on a miss.
+        """
+        tree = self.trees.get(source)
+        if tree is not None:
+            self.hits += 1
+            self.trees.move_to_end(source)
+            return tree
+
+        self.misses += 1
+        tree = self._search(source)
+        self.trees[source] = tree
+
+        # Evict least recently used trees, always keeping the newest one
+        while len(self.trees) > 1 and self.nbytes() > self.max_bytes:
+            self.trees.popitem(last=False)
+            self.evictions += 1
+        return tree
+
+    def discard(self, source):
+        """
+        Drops the cached tree rooted at a person index, if any.
+        """
+        self.trees.pop(source, None)
+
+    def add_edges(self, pairs):
+        """
+        Drops exactly the cached trees that new (person, person) index
+        connections change: those where the two people's depths differ
+        by more than one, or only one of them is reached.
+        """
+        for source, tree in list(self.trees.items()):
+            for first, second in pairs:
+                if _shortcut(self._depth(tree, first),
+                             self._depth(tree, second)):
+                    del self.trees[source]
+                    self.invalidations += 1
+                    break
+
+    def clear(self):
+        """
+        Drops every cached tree, keeping the counters.
+        """
+        self.trees.clear()
+
+    def path(self, source, target):
+        """
+        Returns the shortest list of (movie, person) index pairs that
+        connect the source to the target, from a cached tree rooted at
+        either of them. On a miss, the source's tree is built.
+
+        If no possible path, returns None.
+        """
+        if target in self.trees and source not in self.trees:
+            path = self._walk(self.tree(target), source)
+            if path is None:
+                return None
+
+            # Walked from the source up to the target, so pair each movie
+            # with the next person along the way instead
+            following = [person for _, person in path[1:]] + [target]
+            return [(movie, person)
+                    for (movie, _), person in zip(path, following)]
+
+        path = self._walk(self.tree(source), target)
+        if path is None:
+            return None
+        path.reverse()
+        return path
+
+    def _walk(self, tree, person):
+        """
+        Returns the (movie, person) pairs from `person` back up to the
+        tree's root, starting with `person` itself, or None if the tree
+        does not reach it.
+        """
+        parents, movies = tree
+        if person >= len(parents) or parents[person] == UNREACHED:
+            return None
+        path = []
+        while parents[person] != person:
+            path.append((movies[person], person))
+            person = parents[person]
+        return path
+
+    def _depth(self, tree, person):
+        """
+        Returns the degree of `person` in the tree, or None if unreached.
+        """
+        path = self._walk(tree, person)
+        return None if path is None else len(path)
+
+    def _search(self, source):
+        """
+        Returns the (parents, movies) arrays of a full breadth-first
+        search from the given person index. The root is its own parent.
+        """
+        graph = self.graph
+        parents = array("i", [UNREACHED]) * len(graph)
+        movies = array("i", [UNREACHED]) * len(graph)
+        parents[source] = source
+
+        # The visited order doubles as the queue
+        queue = [source]
+        for person in queue:
+            for movie in graph.movies_for_person(person):
+                for star in graph.stars_for_movie(movie):
+                    if parents[star] == UNREACHED:
+                        parents[star] = person
+                        movies[star] = movie
+                        queue.append(star)
+        return parents, movies
+
+
+def _shortcut(first, second):
+    """
+    Returns whether joining two people at the given depths (None when
+    unreached) would change a breadth-first tree.
+    """
+    if first is None or second is None:
+        return first is not second
+    return abs(first - second) > 1
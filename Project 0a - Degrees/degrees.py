@@ -1,6 +1,15 @@
+import argparse
 import csv
 import sys
-
+from array import array
+
+import ingest
+import paths
+import snapshot
+from bfscache import TreeCache
+from graph import Graph
+from landmarks import LANDMARKS, Landmarks
+from nameindex import NameIndex
 from util import Node, StackFrontier, QueueFrontier
 
 # Maps names to a set of corresponding person_ids
@@ -12,10 +21,71 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact CSR graph of people and movies, used instead of the
+# "movies" and "stars" sets above when loaded with compact=True
+graph = None
+
+# Landmark distances used by the "alt" search, set by build_landmarks
+landmarks = None
+
+# LRU cache of single-source BFS trees used by the "cached" search
+tree_cache = None
+
+# Prefix and fuzzy index over the keys of `names`, built by load_data
+name_index = None
+
 
-def load_data(directory):
+def load_data(directory, compact=False, use_snapshot=False, parallel=False,
+              progress=None):
     """
     Load data from CSV files into memory.
+
+    If `compact` is true, star credits are stored in a compact
+    integer-indexed graph instead of sets on `people` and `movies`.
+
+    If `use_snapshot` is true, the compact graph, `people`, `movies` and
+    `names` are memory-mapped from a binary snapshot next to the CSV
+    files when one is current, and the snapshot is (re)written after
+    parsing the CSV files otherwise.
+    Updates journaled by update_data since then are replayed on top.
+
+    If `parallel` is true, the compact graph is parsed from the CSV files
+    on every core, calling `progress` with status messages as it goes.
+    """
+    global graph, landmarks, tree_cache, name_index, people, movies, names
+    landmarks = None
+    tree_cache = None
+    people, movies, names = {}, {}, {}
+    updates = []
+    sorted_names = None
+    if use_snapshot:
+        loaded = snapshot.load(directory)
+        if loaded is not None:
+            graph, people, movies, names, updates = loaded
+            sorted_names = names.sorted_keys
+        else:
+            load_compact_data(directory, parallel, progress)
+            try:
+                snapshot.save(directory, graph, people, movies, names)
+            except OSError:
+                # A read-only data directory only costs the next run a reparse
+                pass
+    elif compact or parallel:
+        load_compact_data(directory, parallel, progress)
+    else:
+        graph = None
+        load_set_data(directory)
+    name_index = NameIndex(names, sorted_names)
+
+    # Replay updates journaled since the snapshot was written
+    for update in updates:
+        apply_updates(update)
+
+
+def load_set_data(directory):
+    """
+    Load data from CSV files into memory, keeping star credits as
+    sets of ids on `people` and `movies`.
     """
     # Load people
     with open(f"{directory}/people.csv", encoding="utf-8") as f:
@@ -52,16 +122,199 @@ def load_data(directory):
                 pass
 
 
+def load_compact_data(directory, parallel=False, progress=None):
+    """
+    Load data from CSV files into memory, interning person and movie ids
+    into the compact `graph` rather than building sets of ids.
+    """
+    global graph
+    if parallel:
+        graph = ingest.load(directory, people, movies, names,
+                            progress=progress)
+        return
+
+    graph = Graph()
+
+    # Load people
+    with open(f"{directory}/people.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            graph.add_person(row["id"])
+            people[row["id"]] = {
+                "name": row["name"],
+                "birth": row["birth"]
+            }
+            if row["name"].lower() not in names:
+                names[row["name"].lower()] = {row["id"]}
+            else:
+                names[row["name"].lower()].add(row["id"])
+
+    # Load movies
+    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            graph.add_movie(row["id"])
+            movies[row["id"]] = {
+                "title": row["title"],
+                "year": row["year"]
+            }
+
+    # Load stars as two parallel arrays of dense indices
+    credit_people = array("i")
+    credit_movies = array("i")
+    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            person = graph.person_index.get(row["person_id"])
+            movie = graph.movie_index.get(row["movie_id"])
+            if person is not None and movie is not None:
+                credit_people.append(person)
+                credit_movies.append(movie)
+    graph.build(credit_people, credit_movies)
+
+
+def update_data(directory, new_people=(), new_movies=(), new_stars=()):
+    """
+    Adds rows newly appended to the CSV files in `directory` to the data
+    in memory, without reloading it. Rows are dictionaries with the same
+    keys as the CSV columns.
+
+    If the directory has a snapshot, the rows are also recorded in its
+    journal, so call this once the rows are written to the CSV files.
+    """
+    updates = {
+        "people": list(new_people),
+        "movies": list(new_movies),
+        "stars": list(new_stars)
+    }
+    apply_updates(updates)
+    snapshot.append_journal(directory, updates)
+
+
+def apply_updates(updates):
+    """
+    Adds a dictionary of "people", "movies" and "stars" CSV-style rows
+    to the data in memory.
+    """
+    for row in updates["people"]:
+        add_person(row["id"], row["name"], row["birth"])
+    for row in updates["movies"]:
+        add_movie(row["id"], row["title"], row["year"])
+    for row in updates["stars"]:
+        add_star(row["person_id"], row["movie_id"])
+
+
+def add_person(person_id, name, birth):
+    """
+    Adds a person to the loaded data.
+    Returns False if the person already exists.
+    """
+    if person_id in people:
+        return False
+
+    if graph is not None:
+        people[person_id] = {"name": name, "birth": birth}
+        person = graph.add_person(person_id)
+    else:
+        people[person_id] = {"name": name, "birth": birth, "movies": set()}
+        person = person_id
+
+    if name.lower() not in names:
+        names[name.lower()] = {person_id}
+    else:
+        names[name.lower()].add(person_id)
+    if name_index is not None:
+        name_index.add(name)
+
+    # Nobody is connected to a new person yet, so no search is affected
+    if landmarks is not None:
+        landmarks.add_person(person)
+    return True
+
+
+def add_movie(movie_id, title, year):
+    """
+    Adds a movie to the loaded data.
+    Returns False if the movie already exists.
+    """
+    if movie_id in movies:
+        return False
+
+    if graph is not None:
+        movies[movie_id] = {"title": title, "year": year}
+        graph.add_movie(movie_id)
+    else:
+        movies[movie_id] = {"title": title, "year": year, "stars": set()}
+    return True
+
+
+def add_star(person_id, movie_id):
+    """
+    Adds a star credit to the loaded data, invalidating only the cached
+    searches whose distances the new connections change.
+    Returns False if the person or movie is unknown, or the credit exists.
+    """
+    if person_id not in people or movie_id not in movies:
+        return False
+
+    if graph is not None:
+        person = graph.person_index[person_id]
+        movie = graph.movie_index[movie_id]
+        costars = list(graph.stars_for_movie(movie))
+        if not graph.add_credit(person, movie):
+            return False
+    else:
+        if movie_id in people[person_id]["movies"]:
+            return False
+        person = person_id
+        costars = list(movies[movie_id]["stars"])
+        people[person_id]["movies"].add(movie_id)
+        movies[movie_id]["stars"].add(person_id)
+
+    # The credit connects the person to everyone else in the movie
+    pairs = [(person, costar) for costar in costars if costar != person]
+    if landmarks is not None:
+        landmarks.add_edges(pairs)
+    if tree_cache is not None:
+        tree_cache.add_edges(pairs)
+    return True
+
 
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    parser = argparse.ArgumentParser(
+        description="Find degrees of separation between two actors.")
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("--compact", action="store_true",
+                        help="store the graph in compact integer arrays")
+    parser.add_argument("--snapshot", action="store_true",
+                        help="load the compact graph from a binary snapshot "
+                             "next to the CSV files, writing one if needed")
+    parser.add_argument("--parallel", action="store_true",
+                        help="parse the CSV files into the compact graph "
+                             "on every core, reporting progress")
+    parser.add_argument("--method", choices=sorted(SEARCHES), default="bfs",
+                        help="search algorithm used to connect the actors")
+    parser.add_argument("--landmarks", type=int, default=LANDMARKS,
+                        help="number of landmarks for the alt search")
+    parser.add_argument("--all", action="store_true",
+                        help="list every shortest connection")
+    parser.add_argument("--k", type=int,
+                        help="list the k shortest connections")
+    args = parser.parse_args()
+    if args.method == "cached" and not (
+        args.compact or args.snapshot or args.parallel
+    ):
+        parser.error("--method cached needs --compact, --snapshot "
+                     "or --parallel")
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    load_data(args.directory, compact=args.compact,
+              use_snapshot=args.snapshot, parallel=args.parallel,
+              progress=lambda message: print(message, file=sys.stderr))
     print("Data loaded.")
+    if args.method == "alt":
+        build_landmarks(args.landmarks)
 
     source = person_id_for_name(input("Name: "))
     if source is None:
@@ -70,26 +323,49 @@ def main():
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    if args.all or args.k:
+        if args.all:
+            connections = all_shortest_paths(source, target)
+        else:
+            connections = k_shortest_paths(source, target, args.k)
+        found = False
+        for n, path in enumerate(connections, 1):
+            found = True
+            print(f"Connection {n}:")
+            print_path(source, path)
+        if not found:
+            print("Not connected.")
+        return
+
+    path = shortest_path(source, target, method=args.method)
 
     if path is None:
         print("Not connected.")
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
+
+
+def print_path(source, path):
+    """
+    Prints a list of (movie_id, person_id) pairs starting from the source.
+    """
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, method="bfs"):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
+    `method` names the search algorithm to use, one of `SEARCHES`.
+
     If no possible path, returns None.
     """
 
@@ -101,13 +377,33 @@ def shortest_path(source, target):
     if source == target:
         sys.exit("Same actor entered twice")
 
+    search = SEARCHES[method]
+
+    # Search over dense indices when the compact graph is loaded
+    if graph is not None:
+        path = search(graph.person_index[source],
+                      graph.person_index[target],
+                      graph.neighbors)
+        return graph.external_path(path)
+
+    return search(source, target, _neighbors)
+
+
+def breadth_first_search(source, target, neighbors):
+    """
+    Returns the shortest list of (movie, person) pairs that connect
+    the source to the target, where `neighbors(person)` yields the
+    (movie, person) pairs adjacent to a person.
+
+    If no possible path, returns None.
+    """
+
     # Define frontier as queue for breadth-first search
     frontier = QueueFrontier()
     # Track degrees of separation
     degree = 0
-    # Track explored actors, create empty result queue
-    explored = list()
-    explored.append(source)
+    # Track explored actors in a set for constant-time membership checks
+    explored = {source}
 
     # Track result and next upper node we know to be on the result path
     result = []
@@ -126,27 +422,24 @@ def shortest_path(source, target):
         # print(frontier)
 
         # For each degree, search for result in expanded nodes
-        size = len(frontier.frontier)
+        size = len(frontier)
         for i in range(size):
             expanded_node = frontier.remove()
-            for movie in people[expanded_node.state[1]]["movies"]:
-                # Expand actors and add individual nodes to frontier
-                for actor in movies[movie]["stars"]:
-                    # Check if actor is target, if yes, add final movie to result and set last correct node
-                    if actor == target:
-                        result.append((movie, actor))
-                        upper_correct_node = expanded_node
-                        # Break out of all loops if found result
-                        break
-
-                    # Check if already visited actor - add to frontier and explored if not
-                    elif actor not in explored:
-                        node = Node((movie, actor), expanded_node, degree)
-                        frontier.add(node)
-                        explored.append(actor)
-                if len(result) > 0:
+            # Expand actors and add individual nodes to frontier
+            for movie, actor in neighbors(expanded_node.state[1]):
+                # Check if actor is target, if yes, add final movie to result and set last correct node
+                if actor == target:
+                    result.append((movie, actor))
+                    upper_correct_node = expanded_node
+                    # Break out of all loops if found result
                     break
 
+                # Check if already visited actor - add to frontier and explored if not
+                elif actor not in explored:
+                    node = Node((movie, actor), expanded_node, degree)
+                    frontier.add(node)
+                    explored.add(actor)
+
             if len(result) > 0:
                 break
 
@@ -154,7 +447,7 @@ def shortest_path(source, target):
             break
 
     # Finally, if the frontier has nowhere else to look, return no result
-    if frontier.empty():
+    if len(result) == 0:
         return None
     # Else, unpack frontier and reverse to get result
     else:
@@ -168,15 +461,199 @@ def shortest_path(source, target):
         return result
 
 
+def bidirectional_search(source, target, neighbors):
+    """
+    Returns the shortest list of (movie, person) pairs that connect
+    the source to the target, growing breadth-first frontiers from
+    both ends and always expanding the smaller one.
+
+    If no possible path, returns None.
+    """
+    if source == target:
+        return []
+
+    # Map each reached actor to its search node, one map per direction
+    forward = {source: Node((None, source), None, 0)}
+    backward = {target: Node((None, target), None, 0)}
+    forward_frontier = [source]
+    backward_frontier = [target]
+
+    while forward_frontier and backward_frontier:
+        # Grow the smaller frontier by one whole degree
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = _expand_degree(
+                forward_frontier, forward, backward, neighbors)
+        else:
+            backward_frontier, meeting = _expand_degree(
+                backward_frontier, backward, forward, neighbors)
+
+        if meeting is not None:
+            return _join_path(forward[meeting], backward[meeting])
+
+    return None
+
+
+def _expand_degree(frontier, reached, other, neighbors):
+    """
+    Expands every actor in `frontier` by one degree, recording new nodes
+    in `reached`. Returns the next frontier and the first actor that was
+    also reached by the `other` direction, or None.
+
+    Any actor reached by the other direction below its current depth has
+    already been expanded from that side, so it cannot be adjacent to
+    this frontier; the first meeting is therefore on a shortest path.
+    """
+    next_frontier = []
+    for person in frontier:
+        parent = reached[person]
+        for movie, actor in neighbors(person):
+            if actor in reached:
+                continue
+            reached[actor] = Node((movie, actor), parent, parent.degree + 1)
+            if actor in other:
+                return next_frontier, actor
+            next_frontier.append(actor)
+    return next_frontier, None
+
+
+def _join_path(forward_node, backward_node):
+    """
+    Joins the forward search chain ending at a meeting actor with the
+    backward chain starting there into a list of (movie, person) pairs.
+    """
+    path = []
+
+    # Walk back to the source, then reverse
+    node = forward_node
+    while node.parent is not None:
+        path.append(node.state)
+        node = node.parent
+    path.reverse()
+
+    # Walk on to the target, moving each movie onto the next actor
+    node = backward_node
+    while node.parent is not None:
+        path.append((node.state[0], node.parent.state[1]))
+        node = node.parent
+
+    return path
+
+
+def landmark_search(source, target, neighbors):
+    """
+    Returns the shortest list of (movie, person) pairs that connect
+    the source to the target, using A* search with landmark lower bounds.
+    Landmarks are built with the default count on first use.
+
+    If no possible path, returns None.
+    """
+    if landmarks is None:
+        build_landmarks()
+    return landmarks.search(source, target, neighbors)
+
+
+def cached_search(source, target, neighbors):
+    """
+    Returns the shortest list of (movie, person) pairs that connect
+    the source to the target, from a cached single-source BFS tree
+    rooted at either of them, building the source's tree on a miss.
+    Needs the compact graph.
+
+    If no possible path, returns None.
+    """
+    global tree_cache
+    if graph is None:
+        raise Exception("cached search needs the compact graph")
+    if tree_cache is None:
+        tree_cache = TreeCache(graph)
+    return tree_cache.path(source, target)
+
+
+def build_landmarks(count=LANDMARKS):
+    """
+    Precomputes distances from `count` landmark actors to every person,
+    for the "alt" search and estimate_degrees.
+    """
+    global landmarks
+    if graph is not None:
+        landmarks = Landmarks(range(len(graph)), graph.neighbors, count)
+    else:
+        person_ids = list(people)
+        index = {person_id: i for i, person_id in enumerate(person_ids)}
+        landmarks = Landmarks(person_ids, _neighbors, count, index=index)
+    return landmarks
+
+
+def estimate_degrees(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from landmark distances alone, without searching.
+    `upper` is None if no landmark reaches them.
+
+    Returns None if the two people are not connected.
+    """
+    if landmarks is None:
+        build_landmarks()
+    if graph is not None:
+        source = graph.person_index[source]
+        target = graph.person_index[target]
+    return landmarks.estimate(source, target)
+
+
+# Search algorithms available to shortest_path, by name
+SEARCHES = {
+    "alt": landmark_search,
+    "bfs": breadth_first_search,
+    "bidirectional": bidirectional_search,
+    "cached": cached_search
+}
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, lazily, one path at a time.
+    """
+    if graph is not None:
+        for path in paths.all_shortest_paths(graph.person_index[source],
+                                             graph.person_index[target],
+                                             graph.neighbors):
+            yield graph.external_path(path)
+    else:
+        yield from paths.all_shortest_paths(source, target, _neighbors)
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Yields up to `k` lists of (movie_id, person_id) pairs that connect
+    the source to the target without repeating anyone, shortest first.
+    """
+    if graph is not None:
+        for path in paths.k_shortest_paths(graph.person_index[source],
+                                           graph.person_index[target],
+                                           k, graph.neighbors):
+            yield graph.external_path(path)
+    else:
+        yield from paths.k_shortest_paths(source, target, k, _neighbors)
+
+
 def person_id_for_name(name):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
     """
     person_ids = list(names.get(name.lower(), set()))
+
+    # Fall back to similarly spelled names, always asking which was meant
+    corrected = False
+    if len(person_ids) == 0 and name_index is not None:
+        person_ids = [person_id for _, match in name_index.fuzzy(name)
+                      for person_id in sorted(names[match])]
+        corrected = True
+
     if len(person_ids) == 0:
         return None
-    elif len(person_ids) > 1:
+    elif len(person_ids) > 1 or corrected:
         print(f"Which '{name}'?")
         for person_id in person_ids:
             person = people[person_id]
@@ -199,6 +676,9 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
+
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -207,5 +687,15 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def _neighbors(person_id):
+    """
+    Yields (movie_id, person_id) pairs for people who starred with
+    a given person, without building an intermediate set.
+    """
+    for movie_id in people[person_id]["movies"]:
+        for star_id in movies[movie_id]["stars"]:
+            yield movie_id, star_id
+
+
 if __name__ == "__main__":
     main()
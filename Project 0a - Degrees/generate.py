@@ -0,0 +1,105 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+
+# Syllables used to make up names and titles
+SYLLABLES = [
+    "ba", "be", "bo", "ca", "da", "de", "di", "el", "fa", "ga", "ha", "jo",
+    "ka", "ke", "la", "li", "lo", "ma", "me", "mi", "na", "ne", "no", "pa",
+    "ra", "re", "ri", "ro", "sa", "se", "ta", "te", "to", "va", "wi", "za"
+]
+
+# Average number of stars per movie; IMDb-like data lands close to this
+MEAN_CAST = 4
+
+# Shape of the power laws for cast sizes and how often people are cast
+CAST_EXPONENT = 2.5
+POPULARITY_EXPONENT = 1.1
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Generate a synthetic IMDb-like Degrees dataset.")
+    parser.add_argument("directory")
+    parser.add_argument("--credits", type=int, default=100000,
+                        help="approximate number of rows in stars.csv")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    counts = generate(args.directory, args.credits, args.seed)
+    print("Wrote {} people, {} movies and {} credits to {}".format(
+        *counts, args.directory))
+
+
+def generate(directory, credits, seed=0):
+    """
+    Writes people.csv, movies.csv and stars.csv with about `credits`
+    star credits to `directory`. Cast sizes and how many movies each
+    person stars in both follow power laws, as in the IMDb data.
+
+    Returns the number of people, movies and credits written.
+    """
+    rng = random.Random(seed)
+    movie_count = max(1, credits // MEAN_CAST)
+    person_count = max(2, credits // 3)
+    os.makedirs(directory, exist_ok=True)
+
+    # Names repeat now and then, so that lookups have to disambiguate
+    with open(os.path.join(directory, "people.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(person_count):
+            birth = rng.randint(1900, 2005) if rng.random() < 0.7 else ""
+            writer.writerow([person + 1, _name(rng, 2), birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movie_count):
+            writer.writerow([movie + 1, _name(rng, rng.randint(1, 4)),
+                             rng.randint(1910, 2020)])
+
+    # A few people star in a great many movies, most in just one or two
+    weights = [1 / (rank + 1) ** POPULARITY_EXPONENT
+               for rank in range(person_count)]
+    rng.shuffle(weights)
+    cumulative = list(itertools.accumulate(weights))
+
+    written = 0
+    with open(os.path.join(directory, "stars.csv"), "w", newline="",
+              encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movie_count):
+            cast = min(person_count, int(rng.paretovariate(CAST_EXPONENT)
+                                         * MEAN_CAST / 2) + 1)
+            # Mix well-known stars with people picked uniformly at random
+            popular = (cast + 1) // 2
+            stars = set(rng.choices(range(person_count),
+                                    cum_weights=cumulative, k=popular))
+            stars.update(rng.randrange(person_count)
+                         for _ in range(cast - popular))
+            for person in stars:
+                writer.writerow([person + 1, movie + 1])
+            written += len(stars)
+
+    return person_count, movie_count, written
+
+
+def _name(rng, words):
+    """
+    Returns a made-up name of the given number of words.
+    """
+    return " ".join(
+        "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(1, 3)))
+        .capitalize()
+        for _ in range(words)
+    )
+
+
+if __name__ == "__main__":
+    main()
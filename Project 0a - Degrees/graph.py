@@ -0,0 +1,167 @@
+from array import array
+
+
+class Graph():
+    """
+    Person <-> movie bipartite graph with IMDB ids interned to dense
+    integers and adjacency stored in compressed-sparse-row (CSR) arrays.
+
+    The movies of person `p` are
+        person_movies[person_offsets[p]:person_offsets[p + 1]]
+    and the stars of movie `m` are
+        movie_people[movie_offsets[m]:movie_offsets[m + 1]]
+    """
+
+    def __init__(self):
+        # Dense index -> IMDB id
+        self.person_ids = []
+        self.movie_ids = []
+
+        # IMDB id -> dense index
+        self.person_index = {}
+        self.movie_index = {}
+
+        # CSR adjacency arrays, filled in by build()
+        self.person_offsets = array("l", [0])
+        self.person_movies = array("i")
+        self.movie_offsets = array("l", [0])
+        self.movie_people = array("i")
+
+        # Credits added after build(), kept beside the CSR arrays
+        self.added_movies = {}
+        self.added_people = {}
+
+    def __len__(self):
+        return len(self.person_ids)
+
+    def add_person(self, person_id):
+        """
+        Interns a person id, returning its dense index.
+        """
+        index = self.person_index.get(person_id)
+        if index is None:
+            index = len(self.person_ids)
+            self.person_index[person_id] = index
+            self.person_ids.append(person_id)
+        return index
+
+    def add_movie(self, movie_id):
+        """
+        Interns a movie id, returning its dense index.
+        """
+        index = self.movie_index.get(movie_id)
+        if index is None:
+            index = len(self.movie_ids)
+            self.movie_index[movie_id] = index
+            self.movie_ids.append(movie_id)
+        return index
+
+    def build(self, credit_people, credit_movies):
+        """
+        Builds both CSR adjacency arrays from two parallel sequences
+        of dense person and movie indices, one entry per star credit.
+        Duplicate credits are kept only once.
+        """
+        self.person_offsets, self.person_movies = _csr(
+            len(self.person_ids), credit_people, credit_movies)
+        self.movie_offsets, self.movie_people = _csr(
+            len(self.movie_ids), credit_movies, credit_people)
+
+    def add_credit(self, person, movie):
+        """
+        Adds a star credit between a dense person and movie index after
+        the graph was built. Returns False if the credit already existed.
+        """
+        if movie in self.movies_for_person(person):
+            return False
+        self.added_movies.setdefault(person, []).append(movie)
+        self.added_people.setdefault(movie, []).append(person)
+        return True
+
+    def movies_for_person(self, person):
+        """
+        Returns the dense movie indices the given person starred in.
+        """
+        return _row(self.person_offsets, self.person_movies,
+                    self.added_movies, person)
+
+    def stars_for_movie(self, movie):
+        """
+        Returns the dense person indices who starred in the given movie.
+        """
+        return _row(self.movie_offsets, self.movie_people,
+                    self.added_people, movie)
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) dense index pairs for people
+        who starred with a given person.
+        """
+        for movie in self.movies_for_person(person):
+            for star in self.stars_for_movie(movie):
+                yield movie, star
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person, using IMDB ids.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[star])
+            for movie, star in self.neighbors(self.person_index[person_id])
+        }
+
+    def external_path(self, path):
+        """
+        Converts a path of (movie, person) dense index pairs
+        into (movie_id, person_id) pairs.
+        """
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person])
+                for movie, person in path]
+
+
+def _row(offsets, columns, added, row):
+    """
+    Returns the columns of a CSR row, followed by any added since
+    the arrays were built. Rows past the arrays only have added columns.
+    """
+    if row + 1 < len(offsets):
+        built = columns[offsets[row]:offsets[row + 1]]
+    else:
+        built = ()
+    if row in added:
+        return list(built) + added[row]
+    return built
+
+
+def _csr(rows, row_indices, column_indices):
+    """
+    Builds (offsets, columns) CSR arrays for `rows` rows out of parallel
+    row and column index sequences, dropping duplicate entries in a row.
+    """
+    # Count entries per row, then turn counts into starting offsets
+    counts = array("l", [0]) * (rows + 1)
+    for row in row_indices:
+        counts[row + 1] += 1
+    for i in range(rows):
+        counts[i + 1] += counts[i]
+
+    # Scatter columns into their rows
+    cursor = array("l", counts)
+    columns = array("i", [0]) * len(column_indices)
+    for row, column in zip(row_indices, column_indices):
+        columns[cursor[row]] = column
+        cursor[row] += 1
+
+    # Compact each row in place, keeping a single copy of each column
+    offsets = array("l", [0]) * (rows + 1)
+    end = 0
+    for row in range(rows):
+        unique = sorted(set(columns[counts[row]:counts[row + 1]]))
+        columns[end:end + len(unique)] = array("i", unique)
+        end += len(unique)
+        offsets[row + 1] = end
+    del columns[end:]
+    return offsets, columns
@@ -0,0 +1,393 @@
+import csv
+import gc
+import io
+import multiprocessing
+import os
+import time
+from array import array
+
+from graph import Graph, _csr
+
+try:
+    import resource
+except ImportError:
+    resource = None
+
+# Number of byte ranges each CSV file, and row ranges each CSR array, is
+# split into per worker, so that progress is reported steadily and slow
+# parts even out
+CHUNKS_PER_WORKER = 4
+
+# Ends each value of the columns workers send back joined into one
+# string, as CSV fields never contain it
+SEPARATOR = "\0"
+
+# Graph being loaded, inherited by forked stars.csv workers
+_graph = None
+
+
+def load(directory, people, movies, names, workers=None, progress=None):
+    """
+    Loads the CSV files in `directory` into a compact Graph, filling in
+    `people`, `movies` and `names`, using every core available.
+
+    Every CSV file is split into byte ranges parsed by forked workers.
+    Those of people.csv and movies.csv send back each column joined into
+    one string, which is split and interned in bulk. Those of stars.csv
+    share the interned ids and send back dense index arrays already
+    split by CSR row range, and workers then build each row range of
+    both CSR arrays.
+    `progress`, if given, is called with a message as each part is done.
+    """
+    # Millions of new dictionaries and sets would otherwise set off full
+    # collections over and over that find nothing to free
+    collecting = gc.isenabled()
+    gc.disable()
+    try:
+        return _load(directory, people, movies, names, workers, progress)
+    finally:
+        if collecting:
+            gc.enable()
+
+
+def _load(directory, people, movies, names, workers, progress):
+    global _graph
+    workers = workers or os.cpu_count() or 1
+    report = _Progress(progress)
+    context = _fork_context() if workers > 1 else None
+    parts = workers * CHUNKS_PER_WORKER
+
+    # Parse people.csv and movies.csv side by side
+    with _pool(context, workers) as pool:
+        person_results = pool.imap(_read_table, [
+            (chunk, ("id", "name", "birth")) for chunk in
+            _chunks(os.path.join(directory, "people.csv"), parts)])
+        movie_results = pool.imap(_read_table, [
+            (chunk, ("id", "title", "year")) for chunk in
+            _chunks(os.path.join(directory, "movies.csv"), parts)])
+        stage = "people.csv and movies.csv"
+        person_columns = _gather(person_results, 3, report, stage)
+        movie_columns = _gather(movie_results, 3, report, stage)
+
+    # Intern ids and fill in the dictionaries in bulk
+    graph = Graph()
+    person_ids, person_names, births = person_columns
+    person_ids = _split(person_ids)
+    graph.person_ids, graph.person_index = _intern(person_ids)
+    people.update(zip(person_ids, [
+        {"name": name, "birth": birth}
+        for name, birth in zip(_split(person_names), _split(births))
+    ]))
+    for name, person_id in zip(_split(person_names.lower()), person_ids):
+        if name not in names:
+            names[name] = {person_id}
+        else:
+            names[name].add(person_id)
+    movie_ids, titles, years = movie_columns
+    movie_ids = _split(movie_ids)
+    graph.movie_ids, graph.movie_index = _intern(movie_ids)
+    movies.update(zip(movie_ids, [
+        {"title": title, "year": year}
+        for title, year in zip(_split(titles), _split(years))
+    ]))
+    del person_columns, movie_columns, person_ids, person_names, births
+    del movie_ids, titles, years
+    report("people and movies interned", len(people) + len(movies))
+
+    # Stream stars.csv in chunks, in forked workers where possible, each
+    # sorting its credits into the CSR row ranges they belong to
+    person_span = _span(len(graph.person_ids), parts)
+    movie_span = _span(len(graph.movie_ids), parts)
+    by_person = [[] for _ in range(0, len(graph.person_ids), person_span)]
+    by_movie = [[] for _ in range(0, len(graph.movie_ids), movie_span)]
+    credits = 0
+    _graph = graph
+    try:
+        with _pool(context, workers) as pool:
+            tasks = [(chunk, person_span, movie_span) for chunk in
+                     _chunks(os.path.join(directory, "stars.csv"), parts)]
+            for chunk_by_person, chunk_by_movie, rows in pool.imap(
+                    _read_stars, tasks):
+                for credits_by_range, chunk_credits in (
+                    (by_person, chunk_by_person), (by_movie, chunk_by_movie)
+                ):
+                    for in_range, chunk_in_range in zip(credits_by_range,
+                                                        chunk_credits):
+                        in_range.append(chunk_in_range)
+                credits += sum(len(rows_in_range)
+                               for rows_in_range, _ in chunk_by_person)
+                report("stars.csv", rows)
+
+            # Build the row ranges of both CSR arrays side by side
+            person_results = pool.imap(_build_rows, _row_ranges(
+                by_person, person_span, len(graph.person_ids)))
+            movie_results = pool.imap(_build_rows, _row_ranges(
+                by_movie, movie_span, len(graph.movie_ids)))
+            del by_person, by_movie
+            graph.person_offsets, graph.person_movies = _join(person_results)
+            graph.movie_offsets, graph.movie_people = _join(movie_results)
+    finally:
+        _graph = None
+
+    report("graph built", credits)
+    return graph
+
+
+def _fork_context():
+    """
+    Returns a fork multiprocessing context, or None where unsupported.
+    """
+    if "fork" in multiprocessing.get_all_start_methods():
+        return multiprocessing.get_context("fork")
+    return None
+
+
+def _pool(context, workers):
+    """
+    Returns a pool of `workers` processes from a multiprocessing context,
+    or a stand-in running every task in this process if context is None.
+    """
+    if context is None:
+        return _Serial()
+    return context.Pool(workers)
+
+
+class _Serial():
+    """
+    Runs a pool's tasks one after another in the calling process.
+    """
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def imap(self, function, iterable):
+        return map(function, iterable)
+
+
+def _chunks(path, count):
+    """
+    Splits a CSV file into about `count` (path, header, start, end) byte
+    ranges, each starting at the beginning of a record.
+
+    A line break only ends a record where an even number of quotes
+    precedes it, since quoted fields may hold line breaks and escape
+    quotes by doubling them, so quotes are counted on the way.
+    """
+    size = os.path.getsize(path)
+    step = max(1, size // max(1, count))
+    chunks = []
+    with open(path, "rb") as f:
+        header = f.readline()
+        start = position = len(header)
+        quotes = 0
+        while start < size:
+            end = min(size, start + step)
+            quotes += f.read(end - position).count(b'"')
+            position = end
+            while position < size:
+                line = f.readline()
+                quotes += line.count(b'"')
+                position += len(line)
+                if quotes % 2 == 0:
+                    break
+            chunks.append((path, header, start, position))
+            start = position
+    return chunks
+
+
+def _rows(chunk):
+    """
+    Returns the header and a CSV reader over the records of one byte
+    range, leaving line breaks inside quoted fields to the reader.
+    """
+    path, header, start, end = chunk
+    header = next(csv.reader([header.decode("utf-8")]))
+    with open(path, "rb") as f:
+        f.seek(start)
+        data = f.read(end - start).decode("utf-8")
+    return header, csv.reader(io.StringIO(data, newline=""))
+
+
+def _read_table(task):
+    """
+    Parses one byte range of a CSV file, returning the number of rows
+    read and each named column as one string, every value followed by
+    SEPARATOR, which pickles far faster than lists of strings.
+    """
+    chunk, columns = task
+    header, reader = _rows(chunk)
+    positions = [header.index(column) for column in columns]
+    values = [[] for _ in columns]
+    appends = [column.append for column in values]
+    rows = 0
+    for row in reader:
+        if not row:
+            continue
+        rows += 1
+        for append, position in zip(appends, positions):
+            append(row[position])
+    return rows, [SEPARATOR.join(column) + SEPARATOR if column else ""
+                  for column in values]
+
+
+def _gather(results, count, report, stage):
+    """
+    Joins `count` columns sent back for each byte range of a CSV file,
+    reporting the rows of each.
+    """
+    columns = [[] for _ in range(count)]
+    for rows, values in results:
+        for column, joined in zip(columns, values):
+            column.append(joined)
+        report(stage, rows)
+    return ["".join(column) for column in columns]
+
+
+def _split(joined):
+    """
+    Returns the list of values joined by _read_table.
+    """
+    values = joined.split(SEPARATOR)
+    values.pop()
+    return values
+
+
+def _intern(ids):
+    """
+    Returns the distinct ids, first occurrences in order, and a mapping
+    from each to its dense index.
+    """
+    index = dict(zip(ids, range(len(ids))))
+    if len(index) < len(ids):
+        ids = list(dict.fromkeys(ids))
+        index = dict(zip(ids, range(len(ids))))
+    return ids, index
+
+
+def _span(count, parts):
+    """
+    Returns how many rows go in each of about `parts` row ranges.
+    """
+    return max(1, -(-count // parts))
+
+
+def _read_stars(task):
+    """
+    Parses one byte range of stars.csv, returning, for each range of
+    `person_span` people and then of `movie_span` movies, parallel row
+    and column index arrays for the credits whose person and movie are
+    both known, and the number of rows read. Rows are numbered from the
+    start of their range, and columns are dense indices.
+    """
+    chunk, person_span, movie_span = task
+    header, reader = _rows(chunk)
+    person_column = header.index("person_id")
+    movie_column = header.index("movie_id")
+    person_index = _graph.person_index
+    movie_index = _graph.movie_index
+
+    by_person = [(array("i"), array("i"))
+                 for _ in range(0, len(_graph.person_ids), person_span)]
+    by_movie = [(array("i"), array("i"))
+                for _ in range(0, len(_graph.movie_ids), movie_span)]
+    rows = 0
+    for row in reader:
+        if not row:
+            continue
+        rows += 1
+        person = person_index.get(row[person_column])
+        movie = movie_index.get(row[movie_column])
+        if person is not None and movie is not None:
+            part = person // person_span
+            rows_in_part, columns = by_person[part]
+            rows_in_part.append(person - part * person_span)
+            columns.append(movie)
+            part = movie // movie_span
+            rows_in_part, columns = by_movie[part]
+            rows_in_part.append(movie - part * movie_span)
+            columns.append(person)
+    return by_person, by_movie, rows
+
+
+def _row_ranges(credits_by_range, span, rows):
+    """
+    Returns a _build_rows task for each range of `span` of the `rows`
+    rows of a CSR array.
+    """
+    return [(min(span, rows - first), credits)
+            for first, credits in zip(range(0, rows, span),
+                                      credits_by_range)]
+
+
+def _build_rows(task):
+    """
+    Builds the (offsets, columns) CSR arrays of `count` rows out of the
+    credits each stars.csv chunk found in them.
+    """
+    count, credits = task
+    rows = array("i")
+    columns = array("i")
+    for chunk_rows, chunk_columns in credits:
+        rows.extend(chunk_rows)
+        columns.extend(chunk_columns)
+    return _csr(count, rows, columns)
+
+
+def _join(results):
+    """
+    Joins the CSR arrays of consecutive row ranges into one pair.
+    """
+    offsets = array("l", [0])
+    columns = array("i")
+    for range_offsets, range_columns in results:
+        base = len(columns)
+        offsets.extend(base + offset for offset in range_offsets[1:])
+        columns.extend(range_columns)
+    return offsets, columns
+
+
+class _Progress():
+    """
+    Reports rows per second and memory growth to a callback, timing
+    each stage from when the one before it last reported.
+    """
+
+    def __init__(self, callback):
+        self.callback = callback
+        self.rss = _rss_mb()
+        self.rows = {}
+        self.starts = {}
+        self.last = time.perf_counter()
+
+    def __call__(self, stage, rows):
+        if self.callback is None:
+            return
+        now = time.perf_counter()
+        start = self.starts.setdefault(stage, self.last)
+        self.last = now
+        self.rows[stage] = self.rows.get(stage, 0) + rows
+        elapsed = now - start
+        rss = _rss_mb()
+        growth = "" if rss is None else f", memory +{rss - self.rss:.0f} MB"
+        self.callback(f"{stage}: {self.rows[stage]} rows in {elapsed:.1f}s "
+                      f"({self.rows[stage] / max(elapsed, 1e-9):.0f} rows/s"
+                      f"{growth})")
+
+
+def _rss_mb():
+    """
+    Returns the current resident set size in megabytes where /proc is
+    available, else the peak size, or None if neither is.
+    """
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / (1024 * 1024)
+    except (OSError, ValueError, AttributeError):
+        pass
+    if resource is not None:
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return None
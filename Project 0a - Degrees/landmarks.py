@@ -0,0 +1,241 @@
+import random
+from collections import deque
+
+from util import Node, PriorityFrontier
+
+# Default number of landmark actors to precompute distances from
+LANDMARKS = 16
+
+# Distances are stored as uint8, with this value for unreachable people
+UNREACHABLE = 255
+
+# Landmarks guiding each search, those bounding its two people tightest
+ACTIVE_LANDMARKS = 8
+
+
+class Landmarks():
+    """
+    Breadth-first distances from a few landmark actors to every person,
+    used as triangle-inequality bounds on the degrees between two people
+    (the ALT technique: A*, landmarks and triangle inequality).
+    """
+
+    def __init__(self, people, neighbors, count=LANDMARKS, index=None,
+                 seed=0):
+        """
+        Precomputes distances over all `people`, where `neighbors(person)`
+        yields the (movie, person) pairs adjacent to a person.
+
+        `index` maps each person to its position in `people`; when None,
+        people are already dense integer indices.
+        """
+        self.people = people
+        self.neighbors = neighbors
+        self.index = index
+        self.landmarks = []
+        self.distances = []
+
+        if len(people) == 0:
+            return
+
+        # Spread landmarks out: start at random, then repeatedly pick the
+        # reachable person farthest from every landmark chosen so far
+        closest = bytearray([UNREACHABLE]) * len(people)
+        landmark = random.Random(seed).randrange(len(people))
+        for _ in range(min(count, len(people))):
+            distances = self._distances_from(landmark)
+            self.landmarks.append(people[landmark])
+            self.distances.append(distances)
+
+            farthest = None
+            for position, distance in enumerate(distances):
+                if distance < closest[position]:
+                    closest[position] = distance
+                if closest[position] != UNREACHABLE and (
+                    farthest is None or closest[position] > closest[farthest]
+                ):
+                    farthest = position
+            if farthest is None or closest[farthest] == 0:
+                break
+            landmark = farthest
+
+    def _position(self, person):
+        return person if self.index is None else self.index[person]
+
+    def _distances_from(self, landmark):
+        """
+        Returns a uint8 array of degrees from the landmark at the given
+        position to every person.
+        """
+        distances = bytearray([UNREACHABLE]) * len(self.people)
+        distances[landmark] = 0
+        queue = deque([landmark])
+        while queue:
+            position = queue.popleft()
+            degree = min(distances[position] + 1, UNREACHABLE - 1)
+            for _, actor in self.neighbors(self.people[position]):
+                actor = self._position(actor)
+                if distances[actor] == UNREACHABLE:
+                    distances[actor] = degree
+                    queue.append(actor)
+        return distances
+
+    def add_person(self, person):
+        """
+        Makes room for a newly added person, unreachable until credited.
+        """
+        if self.index is None:
+            self.people = range(len(self.people) + 1)
+        else:
+            self.index[person] = len(self.people)
+            self.people.append(person)
+        for distances in self.distances:
+            distances.append(UNREACHABLE)
+
+    def add_edges(self, pairs):
+        """
+        Recomputes distances for exactly the landmarks that new
+        (person, person) connections change: those where the two
+        people's distances differ by more than one, or only one of them
+        is reachable. Returns the number of landmarks recomputed.
+        """
+        pairs = [(self._position(first), self._position(second))
+                 for first, second in pairs]
+        changed = 0
+        for i, distances in enumerate(self.distances):
+            for first, second in pairs:
+                if abs(distances[first] - distances[second]) > 1:
+                    landmark = self._position(self.landmarks[i])
+                    self.distances[i] = self._distances_from(landmark)
+                    changed += 1
+                    break
+        return changed
+
+    def lower_bound(self, source, target):
+        """
+        Returns a lower bound on the degrees between two people,
+        or None if they are known not to be connected.
+        """
+        source = self._position(source)
+        target = self._position(target)
+        bound = 0
+        for distances in self.distances:
+            from_source = distances[source]
+            from_target = distances[target]
+            if (from_source == UNREACHABLE) != (from_target == UNREACHABLE):
+                # Only one of them shares a component with the landmark
+                return None
+            if from_source != UNREACHABLE:
+                bound = max(bound, abs(from_source - from_target))
+        return bound
+
+    def estimate(self, source, target):
+        """
+        Returns (lower, upper) bounds on the degrees between two people
+        without searching, where upper is None if no landmark bounds it.
+        Returns None if the two people are known not to be connected.
+        """
+        lower = self.lower_bound(source, target)
+        if lower is None:
+            return None
+        source = self._position(source)
+        target = self._position(target)
+        upper = None
+        for distances in self.distances:
+            if distances[source] != UNREACHABLE:
+                through = distances[source] + distances[target]
+                if upper is None or through < upper:
+                    upper = through
+        return lower, upper
+
+    def search(self, source, target, neighbors=None,
+               active=ACTIVE_LANDMARKS):
+        """
+        Returns the shortest list of (movie, person) pairs that connect
+        the source to the target, using A* search guided by the landmark
+        lower bounds. `neighbors` defaults to the function the distances
+        were computed with.
+
+        Only the `active` landmarks bounding the source and target
+        tightest are consulted, and each actor's bound is computed once.
+
+        If no possible path, returns None.
+        """
+        bound = self.lower_bound(source, target)
+        if bound is None:
+            return None
+        if neighbors is None:
+            neighbors = self.neighbors
+
+        # Every landmark reaching the target reaches everyone connected to
+        # it, so the others bound nothing in this search
+        source_position = self._position(source)
+        target_position = self._position(target)
+        chosen = sorted(
+            (distances for distances in self.distances
+             if distances[target_position] != UNREACHABLE),
+            key=lambda distances: abs(distances[source_position]
+                                      - distances[target_position]),
+            reverse=True,
+        )[:active]
+        to_target = [(distances, distances[target_position])
+                     for distances in chosen]
+        index = self.index
+
+        # Among equal estimates, expand the actor farthest along first,
+        # heading straight for the target rather than widening the search
+        frontier = PriorityFrontier()
+        frontier.add(Node((None, source), None, 0), (bound, 0))
+        # Fewest degrees found so far to each reached actor
+        reached = {source: 0}
+        # Lower bound from each reached actor to the target
+        bounds = {source: bound}
+
+        while not frontier.empty():
+            node = frontier.remove()
+            person = node.state[1]
+            if person == target:
+                return _path(node)
+
+            # Skip entries superseded by a shorter route to the same actor
+            if node.degree > reached[person]:
+                continue
+
+            # Nothing left on the frontier can reach the target in fewer
+            # degrees than this actor's estimate, so when that is one more
+            # degree, finding the target among its neighbors ends the search
+            finishes = bounds[person] == 1
+            degree = node.degree + 1
+            for movie, actor in neighbors(person):
+                if actor == target and finishes:
+                    return _path(Node((movie, actor), node, degree))
+                if actor in reached and reached[actor] <= degree:
+                    continue
+                bound = bounds.get(actor)
+                if bound is None:
+                    position = actor if index is None else index[actor]
+                    bound = 0
+                    for distances, from_target in to_target:
+                        difference = distances[position] - from_target
+                        if difference < 0:
+                            difference = -difference
+                        if difference > bound:
+                            bound = difference
+                    bounds[actor] = bound
+                reached[actor] = degree
+                frontier.add(Node((movie, actor), node, degree),
+                             (degree + bound, -degree))
+
+        return None
+
+
+def _path(node):
+    """
+    Returns the (movie, person) pairs leading from the root to a node.
+    """
+    path = []
+    while node.parent is not None:
+        path.append(node.state)
+        node = node.parent
+    path.reverse()
+    return path
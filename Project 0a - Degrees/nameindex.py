@@ -0,0 +1,263 @@
+import gc
+from bisect import bisect_left, insort
+
+# Default number of edits allowed by fuzzy lookups
+MAX_DISTANCE = 2
+
+# Default number of names returned by prefix and fuzzy lookups
+LIMIT = 10
+
+# Largest distance the halves index answers; fuzzy lookups allowing more
+# edits check every name of a close enough length
+INDEXED_DISTANCE = 2
+
+
+class NameIndex():
+    """
+    Index over lowercase person names for prefix (type-ahead) lookups,
+    using bisection on a sorted array, and typo-tolerant lookups, using
+    the halves of each name and their one-character deletions to pick
+    candidates for an edit-distance check.
+    """
+
+    def __init__(self, names, keys=None):
+        """
+        Indexes `names`, a mapping of lowercase names to sets of person ids.
+        `keys` is the sequence of those names already sorted, such as a
+        snapshot stores, or None to sort them here.
+        The halves index is built by build_halves(), or else on the
+        first fuzzy lookup.
+        """
+        self.names = names
+        self.keys = sorted(names) if keys is None else keys
+        self.halves = None
+        self.deletions = None
+        self.lengths = None
+
+    def prefix(self, prefix, limit=LIMIT):
+        """
+        Returns up to `limit` names starting with `prefix`, in order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        i = bisect_left(self.keys, prefix)
+        while (i < len(self.keys) and len(matches) < limit
+               and self.keys[i].startswith(prefix)):
+            matches.append(self.keys[i])
+            i += 1
+        return matches
+
+    def fuzzy(self, query, max_distance=MAX_DISTANCE, limit=LIMIT):
+        """
+        Returns up to `limit` names within `max_distance` edits of
+        `query`, closest first, as (distance, name) pairs.
+
+        Lookups of a name one typo away take about 0.9 ms among the
+        77,000 distinct names generated for 87,000 people, but 2.3 ms
+        among the 570,000 generated for 742,000, so miss the
+        sub-millisecond goal at IMDb scale: generated names share halves
+        so often that hundreds of candidates are checked per lookup.
+        """
+        if self.halves is None:
+            self.build_halves()
+
+        query = query.lower()
+        if max_distance > INDEXED_DISTANCE:
+            candidates = [name for length in range(
+                              max(len(query) - max_distance, 0),
+                              len(query) + max_distance + 1)
+                          for name in self.lengths.get(length, ())]
+        else:
+            candidates = self._candidates(query, max_distance)
+
+        matches = []
+        for name in candidates:
+            distance = _distance(query, name, max_distance)
+            if distance is not None:
+                matches.append((distance, name))
+        matches.sort()
+        return matches[:limit]
+
+    def _candidates(self, query, max_distance):
+        """
+        Returns the set of names that may be within `max_distance` edits
+        of `query`, for up to two edits.
+
+        Splitting a name in two halves, two edits leave one half
+        unchanged or make one edit to each. An unchanged half is the
+        query's prefix or suffix of the same length, and a half one edit
+        away shares a one-character deletion, or itself, with a prefix or
+        suffix of the query at most one character longer or shorter.
+        """
+        size = len(query)
+        candidates = set()
+        for length in range(max(size - max_distance, 0),
+                            size + max_distance + 1):
+            first = length // 2
+            last = length - first
+            candidates.update(
+                self.halves.get(_key(length, "<", query[:first]), ()))
+            if last <= size:
+                candidates.update(self.halves.get(
+                    _key(length, ">", query[size - last:]), ()))
+            if max_distance < 2:
+                continue
+
+            # Names with one edit in each half are found by both
+            found = []
+            for side, half in (("<", first), (">", last)):
+                keys = set()
+                for end in range(max(half - 1, 0), min(half + 1, size) + 1):
+                    keys.update(_deletions(
+                        query[:end] if side == "<" else query[size - end:]))
+                names = set()
+                for key in keys:
+                    names.update(self.deletions.get(
+                        _key(length, side, key), ()))
+                if not names:
+                    break
+                found.append(names)
+            else:
+                candidates.update(found[0] & found[1])
+        return candidates
+
+    def person_ids(self, name):
+        """
+        Returns the person ids with the given (case-insensitive) name.
+        """
+        return self.names.get(name.lower(), set())
+
+    def add(self, name):
+        """
+        Indexes a name added to `names` after the index was built.
+        """
+        name = name.lower()
+        i = bisect_left(self.keys, name)
+        if i < len(self.keys) and self.keys[i] == name:
+            return
+        if not isinstance(self.keys, list):
+            # Keys read from a snapshot are copied out to insert into
+            self.keys = list(self.keys)
+        insort(self.keys, name)
+        if self.halves is not None:
+            self._index_name(name)
+
+    def build_halves(self):
+        """
+        Builds the halves -> names and deletions -> names postings and the
+        length -> names buckets used by fuzzy().
+        """
+        self.halves = {}
+        self.deletions = {}
+        self.lengths = {}
+        # Millions of new postings lists would otherwise set off full
+        # collections over and over that find nothing to free
+        collecting = gc.isenabled()
+        gc.disable()
+        try:
+            for name in self.keys:
+                self._index_name(name)
+        finally:
+            if collecting:
+                gc.enable()
+
+    def _index_name(self, name):
+        length = len(name)
+        self.lengths.setdefault(length, []).append(name)
+        first = length // 2
+        for side, half in (("<", name[:first]), (">", name[first:])):
+            prefix = _key(length, side, "")
+            self.halves.setdefault(prefix + half, []).append(name)
+            for deletion in _deletions(half):
+                self.deletions.setdefault(prefix + deletion, []).append(name)
+
+
+def _key(length, side, text):
+    """
+    Returns the postings key of a half, or of a deletion from one, on the
+    given side of names of the given length, as one compact string.
+    """
+    return f"{chr(length)}{side}{text}"
+
+
+def _deletions(text):
+    """
+    Returns the set of a string and the strings one deletion away from it.
+    """
+    deletions = {text}
+    deletions.update(text[:i] + text[i + 1:] for i in range(len(text)))
+    return deletions
+
+
+def _distance(a, b, max_distance):
+    """
+    Returns the Levenshtein distance between two strings, or None if it
+    is greater than `max_distance`, testing small distances directly.
+    """
+    if max_distance > INDEXED_DISTANCE:
+        return edit_distance(a, b, max_distance)
+    if not _within(a, b, max_distance):
+        return None
+    distance = 0
+    while not _within(a, b, distance):
+        distance += 1
+    return distance
+
+
+def _within(a, b, edits):
+    """
+    Returns whether two strings are at most `edits` edits apart. Past
+    their common prefix, the first differing characters must be
+    substituted, or one of them deleted.
+    """
+    if len(a) < len(b):
+        a, b = b, a
+    if len(a) - len(b) > edits:
+        return False
+    i = 0
+    while i < len(b) and a[i] == b[i]:
+        i += 1
+    if i == len(b):
+        return True
+    if edits == 0:
+        return False
+    edits -= 1
+    return (_within(a[i + 1:], b[i + 1:], edits)
+            or _within(a[i + 1:], b[i:], edits)
+            or _within(a[i:], b[i + 1:], edits))
+
+
+def edit_distance(a, b, max_distance):
+    """
+    Returns the Levenshtein distance between two strings,
+    or None if it is greater than `max_distance`.
+    """
+    if abs(len(a) - len(b)) > max_distance:
+        return None
+
+    # Only cells within max_distance of the diagonal can stay within it,
+    # so the rest are left at a value just past it
+    past = max_distance + 1
+    previous = [min(j, past) for j in range(len(b) + 1)]
+    for i, ca in enumerate(a, 1):
+        low = max(1, i - max_distance)
+        high = min(len(b), i + max_distance)
+        current = [past] * (len(b) + 1)
+        if i <= max_distance:
+            current[0] = i
+        best = current[low - 1]
+        for j in range(low, high + 1):
+            cost = previous[j - 1] + (ca != b[j - 1])
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < best:
+                best = cost
+        if best > max_distance:
+            return None
+        previous = current
+    if previous[-1] > max_distance:
+        return None
+    return previous[-1]
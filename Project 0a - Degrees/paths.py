@@ -0,0 +1,153 @@
+import heapq
+import itertools
+
+
+def shortest_path_dag(source, target, neighbors):
+    """
+    Searches breadth-first from the source up to the target's degree,
+    recording every (movie, parent) pair one degree closer to the source
+    for each person reached. Together these parent pointers form the DAG
+    of all shortest paths.
+
+    Returns the parents dictionary, or None if the target is not reached.
+    """
+    depth = {source: 0}
+    parents = {source: []}
+    frontier = [source]
+
+    while frontier and target not in depth:
+        next_frontier = []
+        for person in frontier:
+            degree = depth[person] + 1
+            for movie, actor in neighbors(person):
+                if actor not in depth:
+                    depth[actor] = degree
+                    parents[actor] = [(movie, person)]
+                    next_frontier.append(actor)
+                elif depth[actor] == degree:
+                    parents[actor].append((movie, person))
+        frontier = next_frontier
+
+    if target not in depth:
+        return None
+    return parents
+
+
+def all_shortest_paths(source, target, neighbors):
+    """
+    Yields every shortest list of (movie, person) pairs that connect
+    the source to the target, one at a time.
+
+    Paths are walked lazily out of the shortest path DAG, so only one
+    path is held at a time however many there are.
+    """
+    if source == target:
+        yield []
+        return
+
+    parents = shortest_path_dag(source, target, neighbors)
+    if parents is None:
+        return
+
+    # Depth-first walk from the target back to the source, keeping the
+    # (movie, person) steps taken so far and an iterator per person
+    steps = []
+    people = [target]
+    choices = [iter(parents[target])]
+    while choices:
+        choice = next(choices[-1], None)
+        if choice is None:
+            choices.pop()
+            people.pop()
+            if steps:
+                steps.pop()
+            continue
+
+        movie, parent = choice
+        steps.append((movie, people[-1]))
+        if parent == source:
+            yield steps[::-1]
+            steps.pop()
+        else:
+            people.append(parent)
+            choices.append(iter(parents[parent]))
+
+
+def k_shortest_paths(source, target, k, neighbors):
+    """
+    Yields up to `k` lists of (movie, person) pairs that connect the
+    source to the target without repeating anyone, shortest first.
+
+    Uses Yen's algorithm: each next path branches off a path already
+    found at some actor, with the connections already used from there
+    removed.
+    """
+    first = _restricted_search(source, target, neighbors, set(), set())
+    if first is None or k <= 0:
+        return
+
+    found = [first]
+    seen = {tuple(first)}
+    candidates = []
+    counter = itertools.count()
+    yield first
+
+    while len(found) < k:
+        previous = found[-1]
+        route = [source] + [person for _, person in previous]
+
+        for i in range(len(previous)):
+            spur = route[i]
+            root = previous[:i]
+
+            # Don't branch along a connection already used from this root
+            removed_steps = {
+                (spur,) + path[i] for path in found
+                if len(path) > i and path[:i] == root
+            }
+            removed_people = set(route[:i])
+
+            branch = _restricted_search(spur, target, neighbors,
+                                        removed_people, removed_steps)
+            if branch is not None:
+                path = root + branch
+                if tuple(path) not in seen:
+                    seen.add(tuple(path))
+                    heapq.heappush(candidates,
+                                   (len(path), next(counter), path))
+
+        if not candidates:
+            return
+        path = heapq.heappop(candidates)[2]
+        found.append(path)
+        yield path
+
+
+def _restricted_search(source, target, neighbors, removed_people,
+                       removed_steps):
+    """
+    Returns the shortest list of (movie, person) pairs from source to
+    target avoiding the given people and (person, movie, person) steps,
+    or None if there is none.
+    """
+    parents = {source: None}
+    frontier = [source]
+    while frontier:
+        next_frontier = []
+        for person in frontier:
+            for movie, actor in neighbors(person):
+                if (actor in parents or actor in removed_people
+                        or (person, movie, actor) in removed_steps):
+                    continue
+                parents[actor] = (movie, person)
+                if actor == target:
+                    path = []
+                    while parents[actor] is not None:
+                        movie, parent = parents[actor]
+                        path.append((movie, actor))
+                        actor = parent
+                    path.reverse()
+                    return path
+                next_frontier.append(actor)
+        frontier = next_frontier
+    return None
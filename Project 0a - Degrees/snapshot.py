@@ -0,0 +1,428 @@
+import json
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from itertools import accumulate, islice
+
+from graph import Graph
+
+# Bump whenever the layout of the snapshot file changes
+SNAPSHOT_VERSION = 2
+SNAPSHOT_NAME = "degrees.snapshot"
+JOURNAL_NAME = "degrees.snapshot.journal"
+SOURCES = ("people.csv", "movies.csv", "stars.csv")
+
+MAGIC = b"DEGREES\0"
+ALIGNMENT = 8
+
+# Fields stored as text tables, joined by this separator
+SEPARATOR = "\0"
+
+
+def snapshot_path(directory):
+    """
+    Returns the path of the snapshot file for a data directory.
+    """
+    return os.path.join(directory, SNAPSHOT_NAME)
+
+
+def journal_path(directory):
+    """
+    Returns the path of the journal of updates made since the snapshot.
+    """
+    return os.path.join(directory, JOURNAL_NAME)
+
+
+def source_stats(directory):
+    """
+    Returns the size and modification time of each CSV file in the
+    directory, used to tell whether a snapshot is still current.
+    """
+    stats = {}
+    for name in SOURCES:
+        stat = os.stat(os.path.join(directory, name))
+        stats[name] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def save(directory, graph, people, movies, names):
+    """
+    Writes the graph, the people and movie details and the sorted name
+    index to a versioned binary snapshot next to the CSV files.
+    """
+    texts = {
+        "person_ids": graph.person_ids,
+        "person_names": [people[i]["name"] for i in graph.person_ids],
+        "person_births": [people[i]["birth"] for i in graph.person_ids],
+        "movie_ids": graph.movie_ids,
+        "movie_titles": [movies[i]["title"] for i in graph.movie_ids],
+        "movie_years": [movies[i]["year"] for i in graph.movie_ids],
+        "name_keys": sorted(names)
+    }
+    sections = {}
+    for name, values in texts.items():
+        sections[name], sections[name + "_offsets"] = _text(values)
+
+    # Each name's people, as dense indices, in the order of name_keys
+    name_people = array("i")
+    name_offsets = array("l", [0])
+    for key in texts["name_keys"]:
+        name_people.extend(sorted(graph.person_index[person_id]
+                                  for person_id in names[key]))
+        name_offsets.append(len(name_people))
+
+    sections.update({
+        "person_order": _order(graph.person_ids),
+        "movie_order": _order(graph.movie_ids),
+        "name_offsets": name_offsets,
+        "name_people": name_people,
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_people": graph.movie_people
+    })
+
+    # Lay sections out one after another, each aligned for casting
+    layout = {}
+    position = 0
+    for name, data in sections.items():
+        data = memoryview(data)
+        layout[name] = [position, data.nbytes, data.format]
+        position += _padding(data.nbytes) + data.nbytes
+    header = json.dumps({
+        "version": SNAPSHOT_VERSION,
+        "sources": source_stats(directory),
+        "people": len(graph.person_ids),
+        "movies": len(graph.movie_ids),
+        "sections": layout
+    }).encode("utf-8")
+    end = len(MAGIC) + 4 + len(header)
+    start = _padding(end) + end
+
+    # Write to a temporary file first so readers never see a partial file
+    path = snapshot_path(directory)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(struct.pack("<I", len(header)))
+        f.write(header)
+        f.write(bytes(start - f.tell()))
+        for name, data in sections.items():
+            f.write(bytes(start + layout[name][0] - f.tell()))
+            f.write(data)
+    os.replace(temporary, path)
+
+    # The new snapshot already includes anything journaled before it
+    try:
+        os.remove(journal_path(directory))
+    except FileNotFoundError:
+        pass
+
+
+def append_journal(directory, updates):
+    """
+    Records a batch of updates made since the snapshot, a dictionary of
+    "people", "movies" and "stars" lists of CSV-style rows, along with
+    the CSV file stats once the update is applied to them.
+
+    Does nothing if the directory has no snapshot.
+    """
+    if not os.path.exists(snapshot_path(directory)):
+        return
+    entry = {"updates": updates, "sources": source_stats(directory)}
+    with open(journal_path(directory), "a", encoding="utf-8") as f:
+        f.write(json.dumps(entry) + "\n")
+
+
+def read_journal(directory):
+    """
+    Returns the list of journal entries for the directory's snapshot.
+    """
+    try:
+        with open(journal_path(directory), encoding="utf-8") as f:
+            return [json.loads(line) for line in f if line.strip()]
+    except FileNotFoundError:
+        return []
+
+
+def load(directory):
+    """
+    Memory-maps a current snapshot for the directory. Returns its Graph,
+    the `people`, `movies` and `names` mappings read out of it, and the
+    list of journaled updates still to be applied to them.
+
+    Nothing is decoded up front: ids, details and names are read from
+    the mapped file as they are looked up.
+
+    Returns None if there is no snapshot, it is truncated or corrupt,
+    or it and its journal are out of date.
+    """
+    try:
+        with open(snapshot_path(directory), "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    view = memoryview(buffer)
+    if bytes(view[:len(MAGIC)]) != MAGIC:
+        return None
+    try:
+        length = struct.unpack("<I", view[len(MAGIC):len(MAGIC) + 4])[0]
+        end = len(MAGIC) + 4 + length
+        header = json.loads(bytes(view[len(MAGIC) + 4:end]).decode("utf-8"))
+        if header["version"] != SNAPSHOT_VERSION:
+            return None
+
+        # Current if the CSV files are unchanged since the snapshot,
+        # or since the update last recorded in its journal
+        sources = source_stats(directory)
+        journal = read_journal(directory)
+        if header["sources"] == sources:
+            updates = []
+        elif journal and journal[-1]["sources"] == sources:
+            updates = [entry["updates"] for entry in journal]
+        else:
+            return None
+    except (struct.error, ValueError, KeyError, OSError):
+        return None
+    start = _padding(end) + end
+
+    def section(name):
+        position, size, fmt = header["sections"][name]
+        if position < 0 or size < 0 or start + position + size > len(buffer):
+            raise ValueError(f"section {name} runs past the end of the file")
+        if position % ALIGNMENT:
+            raise ValueError(f"section {name} is misaligned")
+        data = view[start + position:start + position + size]
+        return data if fmt == "B" else data.cast(fmt)
+
+    def text(name):
+        return _Table(section(name), section(name + "_offsets"))
+
+    # A truncated or corrupt file is reparsed rather than read past its end
+    try:
+        return _open(section, text, updates)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def _open(section, text, updates):
+    """
+    Returns the Graph, `people`, `movies` and `names` mappings and
+    `updates` of a mapped snapshot, given functions returning its
+    sections and text tables.
+    """
+    # Ids and their dense indices, looked up through sorted orders
+    graph = Graph()
+    graph.person_ids = text("person_ids")
+    graph.movie_ids = text("movie_ids")
+    graph.person_index = _Index(graph.person_ids, section("person_order"))
+    graph.movie_index = _Index(graph.movie_ids, section("movie_order"))
+
+    # Adjacency arrays are read straight out of the mapped file
+    graph.person_offsets = section("person_offsets")
+    graph.person_movies = section("person_movies")
+    graph.movie_offsets = section("movie_offsets")
+    graph.movie_people = section("movie_people")
+
+    people = _Records(graph.person_index, {
+        "name": text("person_names"),
+        "birth": text("person_births")
+    })
+    movies = _Records(graph.movie_index, {
+        "title": text("movie_titles"),
+        "year": text("movie_years")
+    })
+    names = _Names(text("name_keys"), section("name_offsets"),
+                   section("name_people"), graph.person_ids)
+    return graph, people, movies, names, updates
+
+
+class _Table():
+    """
+    Sequence of the strings in a mapped text table, decoded as they are
+    read. Strings appended afterwards are kept in a list beside it.
+    """
+
+    def __init__(self, data, offsets):
+        self.data = data
+        self.offsets = offsets
+        self.count = len(offsets) - 1
+        self.added = []
+
+    def __len__(self):
+        return self.count + len(self.added)
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        if i >= self.count:
+            return self.added[i - self.count]
+        return str(self.data[self.offsets[i]:self.offsets[i + 1] - 1],
+                   "utf-8")
+
+    def __iter__(self):
+        if self.count:
+            yield from bytes(self.data).decode("utf-8").split(SEPARATOR)
+        yield from self.added
+
+    def append(self, value):
+        self.added.append(value)
+
+
+class _Index():
+    """
+    Maps the strings of a _Table to their positions, by bisecting an
+    array of the positions in order of the strings they hold.
+    Strings added afterwards are kept in a dictionary beside it.
+    """
+
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+        self.added = {}
+
+    def __len__(self):
+        return len(self.order) + len(self.added)
+
+    def __iter__(self):
+        yield from islice(self.table, len(self.order))
+        yield from self.added
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        position = self.get(key)
+        if position is None:
+            raise KeyError(key)
+        return position
+
+    def __setitem__(self, key, position):
+        self.added[key] = position
+
+    def get(self, key, default=None):
+        low, high = 0, len(self.order)
+        while low < high:
+            middle = (low + high) // 2
+            if self.table[self.order[middle]] < key:
+                low = middle + 1
+            else:
+                high = middle
+        if low < len(self.order) and self.table[self.order[low]] == key:
+            return self.order[low]
+        return self.added.get(key, default)
+
+
+class _Records(Mapping):
+    """
+    Maps ids to dictionaries of details read from parallel mapped text
+    tables, made on first access and kept so that they can be updated in
+    place. Records set afterwards are kept the same way.
+    """
+
+    def __init__(self, index, fields):
+        self.index = index
+        self.fields = fields
+        self.records = {}
+
+    def __len__(self):
+        return len(self.index)
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __contains__(self, key):
+        return key in self.records or key in self.index
+
+    def __getitem__(self, key):
+        record = self.records.get(key)
+        if record is None:
+            position = self.index[key]
+            record = {field: table[position]
+                      for field, table in self.fields.items()}
+            self.records[key] = record
+        return record
+
+    def __setitem__(self, key, record):
+        self.records[key] = record
+
+
+class _Names(Mapping):
+    """
+    Maps lowercase names to sets of person ids, bisecting the sorted
+    mapped names and reading each one's people from the mapped file on
+    first access. Sets are kept once made so that they can be updated.
+    """
+
+    def __init__(self, keys, offsets, members, person_ids):
+        self.sorted_keys = keys
+        self.offsets = offsets
+        self.members = members
+        self.person_ids = person_ids
+        self.sets = {}
+        self.added = 0
+
+    def __len__(self):
+        return len(self.sorted_keys) + self.added
+
+    def __iter__(self):
+        yield from self.sorted_keys
+        for key in self.sets:
+            if self._position(key) is None:
+                yield key
+
+    def __contains__(self, key):
+        return key in self.sets or self._position(key) is not None
+
+    def __getitem__(self, key):
+        person_ids = self.sets.get(key)
+        if person_ids is None:
+            i = self._position(key)
+            if i is None:
+                raise KeyError(key)
+            person_ids = {
+                self.person_ids[person]
+                for person in self.members[self.offsets[i]:self.offsets[i + 1]]
+            }
+            self.sets[key] = person_ids
+        return person_ids
+
+    def __setitem__(self, key, person_ids):
+        if key not in self:
+            self.added += 1
+        self.sets[key] = person_ids
+
+    def _position(self, key):
+        i = bisect_left(self.sorted_keys, key)
+        if i < len(self.sorted_keys) and self.sorted_keys[i] == key:
+            return i
+        return None
+
+
+def _text(values):
+    """
+    Encodes a sequence of strings as a single UTF-8 text table, and an
+    array of where each string starts, ending one past the table.
+    """
+    encoded = [value.encode("utf-8") for value in values]
+    offsets = array("l", accumulate((len(value) + 1 for value in encoded),
+                                    initial=0))
+    return SEPARATOR.encode("utf-8").join(encoded), offsets
+
+
+def _order(values):
+    """
+    Returns an array of the positions of `values` in sorted order.
+    """
+    return array("i", sorted(range(len(values)), key=values.__getitem__))
+
+
+def _padding(size):
+    """
+    Returns the number of bytes needed to align `size`.
+    """
+    return -size % ALIGNMENT
@@ -0,0 +1,49 @@
+import io
+import json
+import os
+import unittest
+
+import batch
+import degrees
+
+SMALL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+class TestRunBatch(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        degrees.load_data(SMALL, compact=True)
+
+    def run_lines(self, lines, workers):
+        output = io.StringIO()
+        batch.run_batch(io.StringIO(lines), output, workers=workers)
+        return [json.loads(line) for line in output.getvalue().splitlines()]
+
+    def test_malformed_row_answers_with_an_error(self):
+        lines = ("Kevin Bacon,Tom Hanks\n"
+                 "\n"
+                 "Kevin Bacon,Tom Hanks,Tom Cruise\n"
+                 "Tom Cruise\n"
+                 "102,129\n")
+        for workers in (1, 2):
+            results = self.run_lines(lines, workers)
+            self.assertEqual(len(results), 4)
+            self.assertEqual(results[0]["degrees"], 1)
+            self.assertEqual(results[1]["line"], 3)
+            self.assertEqual(results[1]["row"],
+                             ["Kevin Bacon", "Tom Hanks", "Tom Cruise"])
+            self.assertIn("expected source,target", results[1]["error"])
+            self.assertEqual(results[2]["line"], 4)
+            self.assertIn("error", results[2])
+            self.assertEqual(results[3]["source_id"], "102")
+            self.assertEqual(results[3]["target_id"], "129")
+
+    def test_unknown_person_answers_with_an_error(self):
+        results = self.run_lines("Kevin Bacon,Nobody Atall\n", 1)
+        self.assertEqual(results[0]["error"],
+                         "person not found: Nobody Atall")
+
+
+if __name__ == "__main__":
+    unittest.main()
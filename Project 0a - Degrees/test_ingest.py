@@ -0,0 +1,81 @@
+import csv
+import os
+import tempfile
+import unittest
+
+import degrees
+import ingest
+
+
+class TestParallelLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        path = self.directory.name
+        with open(os.path.join(path, "people.csv"), "w", newline="",
+                  encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "name", "birth"])
+            for i in range(200):
+                name = f"Person {i}"
+                if i % 7 == 0:
+                    name = f"Two\nLine \"{i}\""
+                elif i % 7 == 1:
+                    name = f"Line\u2028Separator {i}"
+                elif i % 7 == 2:
+                    name = f"Next\x85Line\x1cGroup {i}"
+                writer.writerow([str(i), name, str(1900 + i % 100)])
+        with open(os.path.join(path, "movies.csv"), "w", newline="",
+                  encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["id", "title", "year"])
+            for i in range(60):
+                title = f"Movie\n{i}" if i % 3 == 0 else f"Movie {i}"
+                writer.writerow([str(i), title, str(2000 + i % 20)])
+        with open(os.path.join(path, "stars.csv"), "w", newline="",
+                  encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(["person_id", "movie_id"])
+            for i in range(200):
+                writer.writerow([str(i), str(i % 60)])
+                writer.writerow([str(i), str((i * 7) % 60)])
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def serial(self):
+        degrees.load_data(self.directory.name, compact=True, parallel=False)
+        return (dict(degrees.people), dict(degrees.movies),
+                dict(degrees.names), degrees.graph)
+
+    def test_quoted_line_breaks_match_serial_load(self):
+        people, movies, names, graph = self.serial()
+        self.assertIn("Two\nLine \"0\"", [p["name"] for p in people.values()])
+
+        for workers in (1, 2, 4):
+            loaded_people, loaded_movies, loaded_names = {}, {}, {}
+            loaded = ingest.load(self.directory.name, loaded_people,
+                                 loaded_movies, loaded_names, workers=workers)
+            self.assertEqual(loaded_people, people)
+            self.assertEqual(loaded_movies, movies)
+            self.assertEqual(loaded_names, names)
+            self.assertEqual(loaded.person_ids, graph.person_ids)
+            self.assertEqual(list(loaded.person_offsets),
+                             list(graph.person_offsets))
+            self.assertEqual(list(loaded.person_movies),
+                             list(graph.person_movies))
+            self.assertEqual(list(loaded.movie_people),
+                             list(graph.movie_people))
+
+    def test_chunks_start_at_records(self):
+        path = os.path.join(self.directory.name, "people.csv")
+        with open(path, encoding="utf-8", newline="") as f:
+            expected = list(csv.reader(f))[1:]
+        rows = []
+        for chunk in ingest._chunks(path, 50):
+            rows.extend(row for row in ingest._rows(chunk)[1] if row)
+        self.assertEqual(rows, expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
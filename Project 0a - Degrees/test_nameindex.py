@@ -0,0 +1,68 @@
+import random
+import unittest
+
+from nameindex import NameIndex, edit_distance
+
+
+class TestFuzzy(unittest.TestCase):
+
+    def setUp(self):
+        rng = random.Random(0)
+        syllables = ["ba", "bo", "ka", "ke", "la", "lo", "mi", "ra", "te"]
+        self.rng = rng
+        self.names = {}
+        for i in range(1500):
+            name = " ".join(
+                "".join(rng.choice(syllables)
+                        for _ in range(rng.randint(1, 3)))
+                for _ in range(rng.randint(1, 2)))
+            self.names.setdefault(name, set()).add(str(i))
+        for name in ("a", "ab", "bo", ""):
+            self.names.setdefault(name, set()).add(name)
+        self.index = NameIndex(self.names)
+
+    def typo(self, name, edits):
+        characters = list(name)
+        for _ in range(edits):
+            position = self.rng.randrange(len(characters) + 1)
+            operation = self.rng.randrange(3)
+            if operation == 0 or not characters:
+                characters.insert(position, self.rng.choice("abklmort "))
+            elif operation == 1:
+                del characters[min(position, len(characters) - 1)]
+            else:
+                characters[min(position, len(characters) - 1)] = (
+                    self.rng.choice("abklmort "))
+        return "".join(characters)
+
+    def expected(self, query, max_distance):
+        matches = []
+        for name in self.names:
+            distance = edit_distance(query, name, max_distance)
+            if distance is not None:
+                matches.append((distance, name))
+        return sorted(matches)
+
+    def test_matches_every_name_within_distance(self):
+        keys = sorted(self.names)
+        for _ in range(100):
+            query = self.typo(self.rng.choice(keys), self.rng.randrange(4))
+            for max_distance in (0, 1, 2, 3):
+                self.assertEqual(
+                    self.index.fuzzy(query, max_distance, limit=len(keys)),
+                    self.expected(query, max_distance), (query, max_distance))
+
+    def test_short_queries(self):
+        for query in ("", "a", "b", "xy", "abc"):
+            self.assertEqual(self.index.fuzzy(query, limit=len(self.names)),
+                             self.expected(query, 2), query)
+
+    def test_added_names_are_found(self):
+        self.index.fuzzy("bobo")
+        self.names["zyxwvut"] = {"new"}
+        self.index.add("Zyxwvut")
+        self.assertEqual(self.index.fuzzy("zyxvut"), [(1, "zyxwvut")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+import json
+import os
+import shutil
+import struct
+import tempfile
+import unittest
+
+import degrees
+import snapshot
+
+
+class TestSnapshotLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = self.directory.name
+        small = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "small")
+        for name in snapshot.SOURCES:
+            shutil.copy2(os.path.join(small, name), self.path)
+        degrees.load_data(self.path, use_snapshot=True)
+        with open(snapshot.snapshot_path(self.path), "rb") as f:
+            self.data = f.read()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def write(self, data):
+        with open(snapshot.snapshot_path(self.path), "wb") as f:
+            f.write(data)
+
+    def rewrite_header(self, change):
+        """
+        Rewrites the snapshot with its header changed by `change`,
+        keeping the sections after it as they were.
+        """
+        offset = len(snapshot.MAGIC)
+        length = struct.unpack("<I", self.data[offset:offset + 4])[0]
+        end = offset + 4 + length
+        header = json.loads(self.data[offset + 4:end].decode("utf-8"))
+        sections = self.data[snapshot._padding(end) + end:]
+        change(header)
+        header = json.dumps(header).encode("utf-8")
+        end = offset + 4 + len(header)
+        self.write(snapshot.MAGIC + struct.pack("<I", len(header)) + header
+                   + bytes(snapshot._padding(end)) + sections)
+
+    def test_current_snapshot_loads(self):
+        loaded = snapshot.load(self.path)
+        self.assertIsNotNone(loaded)
+        graph, people, movies, names, updates = loaded
+        self.assertEqual(len(graph.person_ids), len(degrees.people))
+        self.assertEqual(people["102"]["name"], "Kevin Bacon")
+        self.assertEqual(updates, [])
+
+    def test_truncated_file_is_reparsed(self):
+        for size in (len(self.data) - 1, len(self.data) // 2, 20, 0):
+            self.write(self.data[:size])
+            self.assertIsNone(snapshot.load(self.path), size)
+
+        # Loading the data again replaces the truncated snapshot
+        self.write(self.data[:len(self.data) // 2])
+        degrees.load_data(self.path, use_snapshot=True)
+        self.assertEqual(degrees.people["102"]["name"], "Kevin Bacon")
+        self.assertIsNotNone(snapshot.load(self.path))
+
+    def test_section_past_end_is_reparsed(self):
+        def grow(header):
+            position, size, fmt = header["sections"]["movie_people"]
+            header["sections"]["movie_people"] = [position, size + 4096, fmt]
+        self.rewrite_header(grow)
+        self.assertIsNone(snapshot.load(self.path))
+
+    def test_odd_section_size_is_reparsed(self):
+        def shrink(header):
+            position, size, fmt = header["sections"]["person_offsets"]
+            header["sections"]["person_offsets"] = [position, size - 1, fmt]
+        self.rewrite_header(shrink)
+        self.assertIsNone(snapshot.load(self.path))
+
+    def test_misaligned_section_is_reparsed(self):
+        def shift(header):
+            position, size, fmt = header["sections"]["person_order"]
+            header["sections"]["person_order"] = [position + 4, size, fmt]
+        self.rewrite_header(shift)
+        self.assertIsNone(snapshot.load(self.path))
+
+
+if __name__ == "__main__":
+    unittest.main()
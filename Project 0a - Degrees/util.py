@@ -1,7 +1,11 @@
-
+import heapq
+import itertools
+from collections import deque
 
 
 class Node():
+    __slots__ = ("state", "parent", "degree")
+
     def __init__(self, state, parent, degree):
         self.state = state
         self.parent = parent
@@ -12,13 +16,19 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Number of nodes in the frontier for each state
+        self.states = {}
+
+    def __len__(self):
+        return len(self.frontier)
 
     def add(self, node):
         self.frontier.append(node)
+        self._index(node)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -27,10 +37,20 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self._unindex(node)
             return node
 
+    def _index(self, node):
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def _unindex(self, node):
+        count = self.states[node.state] - 1
+        if count == 0:
+            del self.states[node.state]
+        else:
+            self.states[node.state] = count
+
 
 class QueueFrontier(StackFrontier):
 
@@ -38,11 +58,44 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self._unindex(node)
             return node
     def __str__(self):
         out = "FRONTIER | "
         for node in self.frontier:
             out += str(node) + "|"
         return out
+
+
+class PriorityFrontier(StackFrontier):
+    """
+    Frontier that removes the node with the lowest `priority(node)` first,
+    breaking ties in insertion order. Defaults to the node's degree.
+    """
+
+    def __init__(self, priority=None):
+        super().__init__()
+        self.frontier = []
+        self.priority = priority or (lambda node: node.degree)
+        self.counter = itertools.count()
+
+    def add(self, node, priority=None):
+        if priority is None:
+            priority = self.priority(node)
+        heapq.heappush(self.frontier, (priority, next(self.counter), node))
+        self._index(node)
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = heapq.heappop(self.frontier)[2]
+            self._unindex(node)
+            return node
+
+    def __str__(self):
+        out = "FRONTIER | "
+        for priority, _, node in sorted(self.frontier):
+            out += "{} ({})|".format(str(node), priority)
+        return out
@@ -0,0 +1,82 @@
+import argparse
+import time
+
+import mcts
+import mnk
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Play the MCTS engine against the minimax engine.")
+    parser.add_argument("--rows", type=int, default=3)
+    parser.add_argument("--columns", type=int, default=3)
+    parser.add_argument("--k", type=int,
+                        help="marks in a row needed to win "
+                             "(default: the shorter side, at most 5)")
+    parser.add_argument("--games", type=int, default=10,
+                        help="games to play, alternating who plays X")
+    parser.add_argument("--playouts", type=int, default=mcts.PLAYOUTS,
+                        help="MCTS playouts per move")
+    parser.add_argument("--budget", type=float, default=mnk.BUDGET,
+                        help="seconds minimax thinks per move")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    k = args.k if args.k is not None else min(args.rows, args.columns, 5)
+
+    report = run(args.rows, args.columns, k, args.games, args.playouts,
+                 args.budget, args.seed)
+    print(f"Board: {args.rows}x{args.columns}, {k} in a row, "
+          f"{report['games']} games")
+    print(f"MCTS: {report['playouts_per_second']:.0f} playouts/s, "
+          f"{report['mcts_seconds_per_move']:.3f}s per move")
+    print(f"Minimax: {report['minimax_seconds_per_move']:.3f}s per move")
+    print(f"MCTS wins {report['mcts_wins']}, minimax wins "
+          f"{report['minimax_wins']}, draws {report['draws']}")
+
+
+def run(rows, columns, k, games, playouts, budget, seed=0):
+    """
+    Plays `games` games between MCTS and minimax on an m,n,k board,
+    MCTS playing X in the even-numbered ones. Returns a report dictionary.
+    """
+    report = {"games": games, "mcts_wins": 0, "minimax_wins": 0,
+              "draws": 0}
+    mcts_seconds = minimax_seconds = 0
+    mcts_moves = minimax_moves = total_playouts = 0
+
+    for number in range(games):
+        game = mnk.Game(rows, columns, k, budget)
+        searcher = mcts.MCTS(game, playouts, seed=seed + number)
+        mcts_player = mnk.X if number % 2 == 0 else mnk.O
+
+        board = game.initial_state()
+        while not game.terminal(board):
+            start = time.perf_counter()
+            if game.player(board) == mcts_player:
+                move = searcher.action(board)
+                mcts_seconds += time.perf_counter() - start
+                mcts_moves += 1
+                total_playouts += searcher.count
+            else:
+                move = game.minimax(board)
+                minimax_seconds += time.perf_counter() - start
+                minimax_moves += 1
+            board = game.result(board, move)
+
+        winner = game.winner(board)
+        if winner is None:
+            report["draws"] += 1
+        elif winner == mcts_player:
+            report["mcts_wins"] += 1
+        else:
+            report["minimax_wins"] += 1
+
+    report["playouts_per_second"] = total_playouts / max(mcts_seconds, 1e-9)
+    report["mcts_seconds_per_move"] = mcts_seconds / max(mcts_moves, 1)
+    report["minimax_seconds_per_move"] = (minimax_seconds
+                                          / max(minimax_moves, 1))
+    return report
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,169 @@
+"""
+Bitboard Tic-Tac-Toe engine
+
+A position is a pair of 9-bit integers (x, o). Cell (i, j) is bit
+3 * i + j, set in `x` or `o` when that player holds the cell.
+"""
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals, as bit masks
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100
+)
+
+# Lookup tables over every 9-bit pattern
+POPCOUNT = tuple(bin(bits).count("1") for bits in range(FULL + 1))
+WINS = tuple(any(bits & mask == mask for mask in WIN_MASKS)
+             for bits in range(FULL + 1))
+
+# Where cell (i, j) moves under each of the 8 symmetries of the square:
+# identity, three rotations, and four reflections
+SYMMETRIES = (
+    lambda i, j: (i, j), lambda i, j: (j, 2 - i),
+    lambda i, j: (2 - i, 2 - j), lambda i, j: (2 - j, i),
+    lambda i, j: (i, 2 - j), lambda i, j: (2 - i, j),
+    lambda i, j: (j, i), lambda i, j: (2 - j, 2 - i)
+)
+
+
+def _transform_table(symmetry):
+    """
+    Returns the image of every 9-bit cell mask under a symmetry.
+    """
+    targets = []
+    for cell in range(9):
+        i, j = symmetry(*divmod(cell, 3))
+        targets.append(3 * i + j)
+    return tuple(
+        sum(1 << target for cell, target in enumerate(targets)
+            if bits >> cell & 1)
+        for bits in range(FULL + 1)
+    )
+
+
+TRANSFORMS = tuple(_transform_table(symmetry) for symmetry in SYMMETRIES)
+
+# Index of the symmetry that undoes each one
+INVERSES = tuple(
+    next(t for t, inverse in enumerate(TRANSFORMS)
+         if all(inverse[table[1 << cell]] == 1 << cell for cell in range(9)))
+    for table in TRANSFORMS
+)
+
+# Cell bits in search order: center first, then corners, then edges
+MOVE_ORDER = (1 << 4, 1 << 0, 1 << 2, 1 << 6, 1 << 8,
+              1 << 1, 1 << 3, 1 << 5, 1 << 7)
+
+
+def x_to_move(x, o):
+    """
+    Returns True if X has the next turn.
+    """
+    return POPCOUNT[x] <= POPCOUNT[o]
+
+
+def moves(x, o):
+    """
+    Returns the empty cell bits, in search order.
+    """
+    occupied = x | o
+    return [bit for bit in MOVE_ORDER if not occupied & bit]
+
+
+def play(x, o, bit):
+    """
+    Returns the position after the player to move takes cell `bit`.
+    """
+    if POPCOUNT[x] <= POPCOUNT[o]:
+        return x | bit, o
+    return x, o | bit
+
+
+def winner(x, o):
+    """
+    Returns 1 if X has three in a row, -1 if O has, 0 otherwise.
+    """
+    if WINS[x]:
+        return 1
+    if WINS[o]:
+        return -1
+    return 0
+
+
+def terminal(x, o):
+    """
+    Returns True if the game is over.
+    """
+    return WINS[x] or WINS[o] or (x | o) == FULL
+
+
+def canonical(x, o):
+    """
+    Returns (x, o, symmetry): the least of the 8 symmetric images of
+    position (x, o), and the index of the symmetry that produces it.
+    """
+    best = None
+    for symmetry, table in enumerate(TRANSFORMS):
+        key = table[o] << 9 | table[x]
+        if best is None or key < best:
+            best, best_symmetry = key, symmetry
+    return best & FULL, best >> 9, best_symmetry
+
+
+def transform(bits, symmetry):
+    """
+    Returns the image of a cell mask under a symmetry.
+    """
+    return TRANSFORMS[symmetry][bits]
+
+
+def untransform(bits, symmetry):
+    """
+    Returns the cell mask that a symmetry maps onto `bits`.
+    """
+    return TRANSFORMS[INVERSES[symmetry]][bits]
+
+
+def from_board(board, x_mark, o_mark):
+    """
+    Converts a list-of-lists board into an (x, o) bitboard position.
+    """
+    x = o = 0
+    for i, row in enumerate(board):
+        for j, cell in enumerate(row):
+            if cell == x_mark:
+                x |= 1 << (3 * i + j)
+            elif cell == o_mark:
+                o |= 1 << (3 * i + j)
+    return x, o
+
+
+def to_board(x, o, x_mark, o_mark, empty):
+    """
+    Converts an (x, o) bitboard position into a list-of-lists board.
+    """
+    board = []
+    for i in range(3):
+        row = []
+        for j in range(3):
+            bit = 1 << (3 * i + j)
+            row.append(x_mark if x & bit else o_mark if o & bit else empty)
+        board.append(row)
+    return board
+
+
+def to_bit(action):
+    """
+    Converts an (i, j) action into its cell bit.
+    """
+    return 1 << (3 * action[0] + action[1])
+
+
+def to_action(bit):
+    """
+    Converts a cell bit into its (i, j) action.
+    """
+    return divmod(bit.bit_length() - 1, 3)
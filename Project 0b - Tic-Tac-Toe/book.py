@@ -0,0 +1,136 @@
+"""
+Perfect-play table for Tic-Tac-Toe
+
+Every board has a base-3 index, the sum of 3 ** cell over X's cells
+plus 2 * 3 ** cell over O's. The table holds one byte per index: the
+best cell (0-8) in the low four bits and the minimax value plus one in
+the next two. Only the canonical board of each set of rotations and
+reflections is stored; the others, and unreachable and finished
+boards, hold NO_ENTRY.
+
+The table ships next to this module. Should it be missing or damaged,
+it is rebuilt and saved to the user's cache directory instead.
+"""
+
+import math
+import os
+import sys
+
+import bitboard
+
+TABLE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                          "tictactoe.table")
+CACHE_PATH = os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"),
+    "tictactoe", "tictactoe.table")
+TABLE_SIZE = 3 ** 9
+NO_ENTRY = 0xFF
+
+# Base-3 index contribution of each 9-bit cell mask
+TERNARY = tuple(sum(3 ** cell for cell in range(9) if bits >> cell & 1)
+                for bits in range(bitboard.FULL + 1))
+
+# Table loaded from disk, or None until first used
+table = None
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python book.py [table]")
+    path = sys.argv[1] if len(sys.argv) == 2 else TABLE_PATH
+    entries = save(build(), path)
+    print(f"Solved {entries} positions into {path}")
+
+
+def index(x, o):
+    """
+    Returns the base-3 index of bitboard position (x, o).
+    """
+    return TERNARY[x] + 2 * TERNARY[o]
+
+
+def build():
+    """
+    Solves every reachable unfinished canonical position and returns
+    the table.
+    """
+    # Imported here, as tictactoe imports this module for minimax
+    import tictactoe
+
+    entries = bytearray([NO_ENTRY]) * TABLE_SIZE
+    stack = [(0, 0)]
+    while stack:
+        x, o, _ = bitboard.canonical(*stack.pop())
+        i = index(x, o)
+        if entries[i] != NO_ENTRY or bitboard.terminal(x, o):
+            continue
+        value, move = tictactoe.search(x, o, -math.inf, math.inf)
+        entries[i] = (value + 1) << 4 | (move.bit_length() - 1)
+        for move in bitboard.moves(x, o):
+            stack.append(bitboard.play(x, o, move))
+    return bytes(entries)
+
+
+def save(entries, path=TABLE_PATH):
+    """
+    Writes the table to `path` and returns how many positions it solves.
+    """
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(entries)
+    os.replace(tmp_path, path)
+    return TABLE_SIZE - entries.count(NO_ENTRY)
+
+
+def load(path=None):
+    """
+    Loads the table from `path`, or else the shipped table or the cached
+    one, and returns it. If none is intact, the table is built and saved
+    to `path`, or else the cache, if writable.
+    """
+    global table
+    paths = [path] if path is not None else [TABLE_PATH, CACHE_PATH]
+    for candidate in paths:
+        entries = _read(candidate)
+        if entries is not None:
+            break
+    else:
+        entries = build()
+        try:
+            save(entries, paths[-1])
+        except OSError:
+            pass
+    table = entries
+    return table
+
+
+def _read(path):
+    """
+    Returns the table stored at `path`, or None if it is missing or
+    damaged.
+    """
+    try:
+        with open(path, "rb") as f:
+            entries = f.read()
+    except OSError:
+        return None
+    return entries if len(entries) == TABLE_SIZE else None
+
+
+def lookup(x, o):
+    """
+    Returns (value, move bit) for the player to move in bitboard position
+    (x, o), or None if the table has no entry for it.
+    """
+    entries = table if table is not None else load()
+    x, o, symmetry = bitboard.canonical(x, o)
+    entry = entries[index(x, o)]
+    if entry == NO_ENTRY:
+        return None
+    return (entry >> 4) - 1, bitboard.untransform(1 << (entry & 0xF),
+                                                  symmetry)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,197 @@
+"""
+Monte Carlo tree search player
+
+Plays any mnk.Game by UCT: each playout walks down the tree picking the
+child with the best upper confidence bound, adds one new node, finishes
+the game with random moves on the bitboard, and credits the result back
+up the path. The tree is kept between moves, so the subtree under the
+position reached is reused on the next one.
+"""
+
+import math
+import random
+import time
+
+from mnk import _popcount
+
+# Playouts per move, unless a time budget is given
+PLAYOUTS = 10000
+
+# Weight of exploring little-visited moves against exploiting good ones
+EXPLORATION = math.sqrt(2)
+
+
+class Node():
+    """
+    A position in the search tree, reached by the player who moved last
+    playing `cell`. `wins` counts playouts won by that player, a draw
+    counting half.
+    """
+
+    __slots__ = ("x", "o", "cell", "parent", "children", "untried",
+                 "visits", "wins", "result")
+
+    def __init__(self, x, o, cell, parent, result, untried):
+        self.x = x
+        self.o = o
+        self.cell = cell
+        self.parent = parent
+        self.children = []
+        self.untried = untried
+        self.visits = 0
+        self.wins = 0
+        self.result = result
+
+
+class MCTS():
+    """
+    Chooses moves in an mnk.Game by Monte Carlo tree search.
+    """
+
+    def __init__(self, game, playouts=PLAYOUTS, budget=None,
+                 exploration=EXPLORATION, seed=None):
+        self.game = game
+        self.playouts = playouts
+        self.budget = budget
+        self.exploration = exploration
+        self.random = random.Random(seed)
+        self.root = None
+        self.count = 0
+
+    def action(self, board, cancel=None):
+        """
+        Returns the action (i, j) most often chosen from the board after
+        `playouts` playouts, or once `budget` seconds have passed or the
+        `cancel` event is set.
+        """
+        if self.game.terminal(board):
+            return None
+        cell = self.search(*self.game.position(board), cancel=cancel)
+        return divmod(cell, self.game.columns)
+
+    def search(self, x, o, cancel=None):
+        """
+        Runs playouts from bitboard position (x, o) and returns the cell
+        of the most visited move.
+        """
+        self.root = self._reuse(x, o)
+        deadline = (math.inf if self.budget is None
+                    else time.perf_counter() + self.budget)
+        self.count = 0
+        while self.count < self.playouts or self.budget is not None:
+            if self.count % 64 == 0 and (
+                time.perf_counter() > deadline
+                or (cancel is not None and cancel.is_set())
+            ):
+                break
+            self.playout()
+            self.count += 1
+
+        best = max(self.root.children, key=lambda child: child.visits,
+                   default=None)
+        if best is None:
+            return self.root.untried[0]
+        return best.cell
+
+    def playout(self):
+        """
+        Runs one playout from the root, growing the tree by a node.
+        """
+        exploration = self.exploration
+        node = self.root
+
+        # Select: descend through fully expanded nodes
+        while not node.untried and node.children:
+            log_visits = math.log(node.visits)
+            node = max(
+                node.children,
+                key=lambda child: child.wins / child.visits
+                + exploration * math.sqrt(log_visits / child.visits)
+            )
+
+        # Expand: add one untried move
+        if node.untried and node.result is None:
+            cell = node.untried.pop(
+                self.random.randrange(len(node.untried)))
+            node = self._child(node, cell)
+
+        # Simulate: 1 if X wins, -1 if O wins, 0 for a draw
+        result = node.result
+        if result is None:
+            result = self._simulate(node.x, node.o)
+
+        # Backpropagate, crediting the player who moved into each node
+        while node is not None:
+            node.visits += 1
+            x_moved = _popcount(node.x) > _popcount(node.o)
+            if result == 0:
+                node.wins += 0.5
+            elif (result == 1) == x_moved:
+                node.wins += 1
+            node = node.parent
+
+    def _child(self, node, cell):
+        """
+        Adds and returns the child of `node` reached by playing `cell`.
+        """
+        game = self.game
+        bit = 1 << cell
+        if _popcount(node.x) <= _popcount(node.o):
+            x, o, stones, winner = node.x | bit, node.o, node.x | bit, 1
+        else:
+            x, o, stones, winner = node.x, node.o | bit, node.o | bit, -1
+
+        result = None
+        if any(stones & line == line for line in game.lines_through[cell]):
+            result = winner
+        elif (x | o) == game.full:
+            result = 0
+        untried = [] if result is not None else _empty_cells(game, x, o)
+
+        child = Node(x, o, cell, node, result, untried)
+        node.children.append(child)
+        return child
+
+    def _simulate(self, x, o):
+        """
+        Finishes the game from (x, o) with uniformly random moves and
+        returns 1 if X wins, -1 if O wins, 0 for a draw.
+        """
+        game = self.game
+        lines_through = game.lines_through
+        cells = _empty_cells(game, x, o)
+        self.random.shuffle(cells)
+        x_to_move = _popcount(x) <= _popcount(o)
+        for cell in cells:
+            bit = 1 << cell
+            if x_to_move:
+                x |= bit
+                stones = x
+            else:
+                o |= bit
+                stones = o
+            for line in lines_through[cell]:
+                if stones & line == line:
+                    return 1 if x_to_move else -1
+            x_to_move = not x_to_move
+        return 0
+
+    def _reuse(self, x, o):
+        """
+        Returns the node for (x, o) if it is the root or lies up to two
+        moves below it, detached from its parent, or else a new root.
+        """
+        if self.root is not None:
+            nodes = [self.root]
+            for _ in range(3):
+                for node in nodes:
+                    if node.x == x and node.o == o:
+                        node.parent = None
+                        return node
+                nodes = [child for node in nodes for child in node.children]
+        return Node(x, o, None, None, None, _empty_cells(self.game, x, o))
+
+
+def _empty_cells(game, x, o):
+    occupied = x | o
+    return [cell for cell in range(game.cells) if not occupied >> cell & 1]
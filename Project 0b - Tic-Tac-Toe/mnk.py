@@ -0,0 +1,527 @@
+"""
+m,n,k-game player
+
+Tic-Tac-Toe generalized to boards of `rows` x `columns` cells, won by
+`k` in a row. Positions are bitboards as in bitboard.py, with cell (i, j)
+at bit i * columns + j. Boards too large to solve outright are searched
+by iterative-deepening alpha-beta with a heuristic evaluation, which
+returns the best move found so far when the time budget runs out.
+
+With several workers, the moves at the root are searched side by side
+in a process pool instead, which share the best root value found so far
+as the bound for the rest.
+"""
+
+import concurrent.futures
+import math
+import multiprocessing
+import os
+import time
+
+from stats import SearchStats
+from tictactoe import X, O, EMPTY
+
+# Value of a won game, less the number of moves taken to win it
+WIN = 1000000
+
+# Seconds to think per move
+BUDGET = 1.0
+
+# The clock is checked every so many nodes
+CHECK_INTERVAL = 1024
+
+# Transposition tables are cleared once they grow this large
+MAX_TRANSPOSITIONS = 1000000
+
+# Kinds of bound a stored value is, relative to the true value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Seconds between checks of the clock while waiting for root workers
+POLL_INTERVAL = 0.05
+
+# Game, shared best root value and stop event of a root search worker
+_worker = None
+
+
+class Game():
+    """
+    An m,n,k-game with the same interface as the tictactoe module.
+    """
+
+    def __init__(self, rows=3, columns=3, k=3, budget=BUDGET, workers=1):
+        if rows < 1 or columns < 1 or not 1 <= k <= max(rows, columns):
+            raise ValueError(f"no {k} in a row on a {rows}x{columns} board")
+        self.rows = rows
+        self.columns = columns
+        self.k = k
+        self.budget = budget
+        self.cells = rows * columns
+        self.full = (1 << self.cells) - 1
+
+        # Every line of k cells, and the lines through each cell
+        self.lines = []
+        for i in range(rows):
+            for j in range(columns):
+                for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+                    end_i, end_j = i + di * (k - 1), j + dj * (k - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < columns:
+                        self.lines.append(sum(
+                            1 << ((i + di * step) * columns + j + dj * step)
+                            for step in range(k)
+                        ))
+        self.lines_through = [
+            [line for line in self.lines if line >> cell & 1]
+            for cell in range(self.cells)
+        ]
+
+        # Cells nearest the center first, as they lie on the most lines
+        center_i, center_j = (rows - 1) / 2, (columns - 1) / 2
+        self.order = sorted(
+            range(self.cells),
+            key=lambda cell: (abs(cell // columns - center_i)
+                              + abs(cell % columns - center_j), cell)
+        )
+
+        # Heuristic weight of a line holding some stones of one player only
+        self.weights = [0] + [4 ** count for count in range(1, k + 1)]
+
+        self.transpositions = {}
+        self.stats = SearchStats()
+        self.deadline = math.inf
+        self.cancel = None
+
+        # Best root value found by other root workers, read while searching
+        # one root move, and the least alpha and greatest beta it implies
+        self.root_bound = None
+        self.root_sign = 1
+        self.floor = -math.inf
+        self.ceiling = math.inf
+
+        # Root search workers, started now rather than from within a
+        # search, which may be running in a thread
+        self.workers = workers or os.cpu_count() or 1
+        self.executor = None
+        if self.workers > 1:
+            self._start_workers()
+
+    def initial_state(self):
+        """
+        Returns starting state of the board.
+        """
+        return [[EMPTY] * self.columns for _ in range(self.rows)]
+
+    def player(self, board):
+        """
+        Returns player who has the next turn on a board.
+        """
+        x, o = self.position(board)
+        return X if _popcount(x) <= _popcount(o) else O
+
+    def actions(self, board):
+        """
+        Returns set of all possible actions (i, j) available on the board.
+        """
+        return {
+            (i, j)
+            for i in range(self.rows)
+            for j in range(self.columns)
+            if board[i][j] == EMPTY
+        }
+
+    def result(self, board, action):
+        """
+        Returns the board that results from making move (i, j) on the board.
+        """
+        i, j = action
+        if not (0 <= i < self.rows and 0 <= j < self.columns):
+            raise Exception("Invalid move - out of bounds")
+        if board[i][j] is not EMPTY:
+            raise Exception("Invalid move - field already filled")
+
+        new_board = [list(row) for row in board]
+        new_board[i][j] = self.player(board)
+        return new_board
+
+    def winner(self, board):
+        """
+        Returns the winner of the game, if there is one.
+        """
+        x, o = self.position(board)
+        if self._wins(x):
+            return X
+        if self._wins(o):
+            return O
+        return None
+
+    def terminal(self, board):
+        """
+        Returns True if game is over, False otherwise.
+        """
+        x, o = self.position(board)
+        return self._wins(x) or self._wins(o) or (x | o) == self.full
+
+    def utility(self, board):
+        """
+        Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
+        """
+        return {X: 1, O: -1, None: 0}[self.winner(board)]
+
+    def minimax(self, board, cancel=None):
+        """
+        Returns the best action for the current player on the board found
+        within the time budget, or before the `cancel` event is set.
+        """
+        if self.terminal(board):
+            return None
+        move = self.search(*self.position(board), cancel=cancel)[1]
+        return divmod(move, self.columns)
+
+    def position(self, board):
+        """
+        Returns the (x, o) bitboard position of a list-of-lists board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, cell in enumerate(row):
+                if cell == X:
+                    x |= 1 << (i * self.columns + j)
+                elif cell == O:
+                    o |= 1 << (i * self.columns + j)
+        return x, o
+
+    def search(self, x, o, budget=None, cancel=None):
+        """
+        Searches bitboard position (x, o) one ply deeper at a time until
+        the game is solved, `budget` seconds (the game's budget if None)
+        have passed, or the `cancel` event, if given, is set.
+
+        Returns (value, cell, depth) from the deepest completed search.
+        The work done is recorded in `stats`.
+        """
+        budget = self.budget if budget is None else budget
+        self.stats = SearchStats().begin()
+        if self.executor is not None:
+            best = self._parallel_search(x, o, budget, cancel)
+        else:
+            best = self._serial_search(x, o, budget, cancel)
+        self.stats.end()
+        return best
+
+    def _serial_search(self, x, o, budget, cancel):
+        """
+        Searches like search(), in this process.
+        """
+        self.deadline = time.perf_counter() + budget
+        self.cancel = cancel
+        if len(self.transpositions) > MAX_TRANSPOSITIONS:
+            self.transpositions.clear()
+
+        maximizing = _popcount(x) <= _popcount(o)
+        empty = self.cells - _popcount(x | o)
+        best = None
+        for depth in range(1, empty + 1):
+            try:
+                value, cell = self._alphabeta(x, o, maximizing, depth, 0,
+                                              -math.inf, math.inf, None)
+            except _Timeout:
+                break
+            best = (value, cell, depth)
+            if abs(value) > WIN - self.cells:
+                break
+
+        # Out of time before even one ply was searched
+        if best is None:
+            occupied = x | o
+            cell = next(cell for cell in self.order
+                        if not occupied >> cell & 1)
+            best = (0, cell, 0)
+        return best
+
+    def evaluate(self, x, o):
+        """
+        Returns a heuristic value of position (x, o) for X: lines still
+        open to one player only count for them, more so the fuller they are.
+        """
+        value = 0
+        weights = self.weights
+        for line in self.lines:
+            x_line = x & line
+            o_line = o & line
+            if not o_line:
+                if x_line:
+                    value += weights[_popcount(x_line)]
+            elif not x_line:
+                value -= weights[_popcount(o_line)]
+        return value
+
+    def close(self):
+        """
+        Shuts down the root search workers, if any.
+        """
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def _start_workers(self):
+        if "fork" in multiprocessing.get_all_start_methods():
+            context = multiprocessing.get_context("fork")
+        else:
+            context = multiprocessing.get_context()
+        self.root_bound = context.Value("d", -math.inf)
+        self.stop = context.Event()
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=self.workers, mp_context=context,
+            initializer=_init_worker,
+            initargs=(self.rows, self.columns, self.k, self.root_bound,
+                      self.stop)
+        )
+        # Start the processes before anything else can run threads
+        for future in [self.executor.submit(int)
+                       for _ in range(self.workers)]:
+            future.result()
+
+    def _parallel_search(self, x, o, budget, cancel):
+        """
+        Searches like search() but one ply deeper at a time over the root
+        moves, which the workers search side by side, each starting with
+        the best root value found by the others so far as its bound.
+        """
+        # Workers can't share this process's clock, so use wall time
+        deadline = time.time() + budget
+        self.stop.clear()
+
+        maximizing = _popcount(x) <= _popcount(o)
+        sign = 1 if maximizing else -1
+        occupied = x | o
+        cells = [cell for cell in self.order if not occupied >> cell & 1]
+        best = None
+        for depth in range(1, len(cells) + 1):
+            # Search the best move from the last depth first
+            if best is not None:
+                cells.remove(best[1])
+                cells.insert(0, best[1])
+
+            self.root_bound.value = -math.inf
+            pending = set()
+            for cell in cells:
+                child = ((x | 1 << cell, o) if maximizing
+                         else (x, o | 1 << cell))
+                pending.add(self.executor.submit(
+                    _search_root_move, *child, cell, maximizing, depth,
+                    deadline))
+
+            results = []
+            while pending:
+                done, pending = concurrent.futures.wait(
+                    pending, timeout=POLL_INTERVAL,
+                    return_when=concurrent.futures.FIRST_COMPLETED)
+                for future in done:
+                    result, worker_stats = future.result()
+                    results.append(result)
+                    self.stats.merge(worker_stats)
+                if (time.time() > deadline
+                        or (cancel is not None and cancel.is_set())):
+                    self.stop.set()
+
+            # Moves cut short leave this depth unfinished
+            if self.stop.is_set() or None in results:
+                break
+
+            # Moves that failed low only bound their value from above
+            value, cell = max(
+                ((value, cell) for cell, value, exact in results if exact),
+                key=lambda result: sign * result[0]
+            )
+            best = (value, cell, depth)
+            if abs(value) > WIN - self.cells:
+                break
+
+        if best is None:
+            best = (0, cells[0], 0)
+        return best
+
+    def _wins(self, stones):
+        return any(stones & line == line for line in self.lines)
+
+    def _alphabeta(self, x, o, maximizing, depth, ply, alpha, beta, last):
+        """
+        Returns (value, cell) for the player to move in position (x, o),
+        searched `depth` plies deep within the (alpha, beta) window.
+        `last` is the cell just played, the only place a new line can be.
+        """
+        stats = self.stats
+        stats.nodes += 1
+        if ply > stats.max_depth:
+            stats.max_depth = ply
+        if stats.nodes % CHECK_INTERVAL == 0:
+            if (time.perf_counter() > self.deadline
+                    or (self.cancel is not None and self.cancel.is_set())):
+                raise _Timeout()
+            if self.root_bound is not None:
+                self._read_root_bound()
+
+        # No value past the best root move found so far matters
+        if alpha < self.floor < beta:
+            alpha = self.floor
+        if alpha < self.ceiling < beta:
+            beta = self.ceiling
+
+        # The player who just moved may have completed a line
+        stats.terminal_checks += 1
+        if last is not None:
+            stones = o if maximizing else x
+            for line in self.lines_through[last]:
+                if stones & line == line:
+                    return (ply - WIN if maximizing else WIN - ply), None
+        occupied = x | o
+        if occupied == self.full:
+            return 0, None
+        if depth == 0:
+            return self.evaluate(x, o), None
+
+        # Wins are stored relative to this node, as they count moves
+        key = (x, o)
+        entry = self.transpositions.get(key)
+        best_cell = None
+        if entry is None:
+            stats.cache_misses += 1
+        else:
+            stats.cache_hits += 1
+            entry_depth, value, bound, best_cell = entry
+            if entry_depth >= depth:
+                value = _from_stored(value, ply)
+                if bound == EXACT:
+                    return value, best_cell
+                elif bound == LOWER:
+                    alpha = max(alpha, value)
+                else:
+                    beta = min(beta, value)
+                if alpha >= beta:
+                    return value, best_cell
+
+        cells = [cell for cell in self.order if not occupied >> cell & 1]
+        if best_cell is not None:
+            cells.remove(best_cell)
+            cells.insert(0, best_cell)
+
+        original_alpha, original_beta = alpha, beta
+        value = -math.inf if maximizing else math.inf
+        for cell in cells:
+            if maximizing:
+                option = self._alphabeta(x | 1 << cell, o, False, depth - 1,
+                                         ply + 1, alpha, beta, cell)[0]
+                if option > value:
+                    value, best_cell = option, cell
+                alpha = max(alpha, value)
+            else:
+                option = self._alphabeta(x, o | 1 << cell, True, depth - 1,
+                                         ply + 1, alpha, beta, cell)[0]
+                if option < value:
+                    value, best_cell = option, cell
+                beta = min(beta, value)
+            if alpha >= beta:
+                break
+
+        # Children searched since the root bound last tightened may have
+        # failed low or high against it rather than the original window
+        if value <= max(original_alpha, self.floor) and value < original_beta:
+            bound = UPPER
+        elif (value >= min(original_beta, self.ceiling)
+              and value > original_alpha):
+            bound = LOWER
+        else:
+            bound = EXACT
+        self.transpositions[key] = (depth, _to_stored(value, ply), bound,
+                                    best_cell)
+        return value, best_cell
+
+    def _read_root_bound(self):
+        """
+        Tightens the floor, or the ceiling when minimizing at the root,
+        to the best root value the root workers have found so far.
+        """
+        bound = self.root_bound.value
+        if self.root_sign > 0:
+            self.floor = max(self.floor, bound)
+        else:
+            self.ceiling = min(self.ceiling, -bound)
+
+
+def _init_worker(rows, columns, k, root_bound, stop):
+    """
+    Sets up a root search worker process with its own game, whose
+    transposition table lasts from one move to the next.
+    """
+    global _worker
+    game = Game(rows, columns, k)
+    game.cancel = stop
+    _worker = (game, root_bound)
+
+
+def _search_root_move(x, o, cell, maximizing, depth, deadline):
+    """
+    Searches position (x, o), reached by playing root move `cell`, to
+    `depth` plies from the root, within the best root value found so far.
+
+    Returns ((cell, value, exact), stats), where exact is False if the
+    move is no better than the bound, or (None, stats) if the search was
+    stopped.
+    """
+    game, root_bound = _worker
+    sign = 1 if maximizing else -1
+
+    # The bound is read again as the search goes, as other moves finish
+    game.root_bound = root_bound
+    game.root_sign = sign
+    game.floor = -math.inf
+    game.ceiling = math.inf
+    game._read_root_bound()
+
+    game.deadline = time.perf_counter() + deadline - time.time()
+    game.stats = SearchStats()
+    try:
+        value = game._alphabeta(x, o, not maximizing, depth - 1, 1,
+                                -math.inf, math.inf, cell)[0]
+    except _Timeout:
+        return None, game.stats
+
+    bound = game.floor if maximizing else -game.ceiling
+    with root_bound.get_lock():
+        if sign * value > root_bound.value:
+            root_bound.value = sign * value
+    return (cell, value, sign * value > bound), game.stats
+
+
+class _Timeout(Exception):
+    """
+    Raised inside a search when its time budget has run out or it has
+    been cancelled.
+    """
+
+
+def _popcount(bits):
+    return bin(bits).count("1")
+
+
+def _to_stored(value, ply):
+    """
+    Returns a value found `ply` moves deep as stored in the table.
+    """
+    if value > WIN // 2:
+        return value + ply
+    if value < -WIN // 2:
+        return value - ply
+    return value
+
+
+def _from_stored(value, ply):
+    """
+    Returns a stored value as seen from `ply` moves deep.
+    """
+    if value > WIN // 2:
+        return value - ply
+    if value < -WIN // 2:
+        return value + ply
+    return value
@@ -1,9 +1,48 @@
+import argparse
 import pygame
+import queue
 import sys
+import threading
 import time
 
+import mcts
+import mnk
 import tictactoe as ttt
 
+parser = argparse.ArgumentParser(description="Play Tic-Tac-Toe.")
+parser.add_argument("--rows", type=int, default=3)
+parser.add_argument("--columns", type=int, default=3)
+parser.add_argument("--k", type=int,
+                    help="marks in a row needed to win "
+                         "(default: the shorter side, at most 5)")
+parser.add_argument("--budget", type=float, default=mnk.BUDGET,
+                    help="seconds the computer thinks per move")
+parser.add_argument("--engine", choices=["minimax", "mcts"],
+                    default="minimax")
+parser.add_argument("--playouts", type=int, default=mcts.PLAYOUTS,
+                    help="playouts per move for the mcts engine")
+parser.add_argument("--workers", type=int, default=1,
+                    help="processes searching the computer's moves "
+                         "(0 for one per core)")
+parser.add_argument("--stats", action="store_true",
+                    help="print the work done by each computer move")
+args = parser.parse_args()
+rows, columns = args.rows, args.columns
+k = args.k if args.k is not None else min(rows, columns, 5)
+
+# The classic game is solved outright; any other is searched
+if (rows, columns, k) == (3, 3, 3):
+    game = ttt
+else:
+    try:
+        game = mnk.Game(rows, columns, k, args.budget, args.workers)
+    except ValueError as error:
+        parser.error(str(error))
+searcher = None
+if args.engine == "mcts":
+    searcher = mcts.MCTS(game if isinstance(game, mnk.Game)
+                         else mnk.Game(rows, columns, k), args.playouts)
+
 pygame.init()
 size = width, height = 600, 400
 
@@ -13,18 +52,64 @@ white = (255, 255, 255)
 
 screen = pygame.display.set_mode(size)
 
+smallFont = pygame.font.Font("OpenSans-Regular.ttf", 18)
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+
+# Fit the board between the title and the Play Again button
+tile_size = min(80, (height - 140) // rows, (width - 40) // columns)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
+
+
+def think(board, cancel, moves):
+    """
+    Finds the computer's move on the board in a background thread and
+    puts (board, move, seconds) on the `moves` queue, unless cancelled.
+    """
+    start = time.perf_counter()
+    if searcher is not None:
+        move = searcher.action(board, cancel)
+    elif isinstance(game, mnk.Game):
+        move = game.minimax(board, cancel)
+    else:
+        move = game.minimax(board)
+    if not cancel.is_set():
+        if args.stats:
+            if searcher is not None:
+                print(f"Move {move}: {searcher.count} playouts")
+            else:
+                print(f"Move {move}: {game.stats}")
+        moves.put((board, move, time.perf_counter() - start))
+
+
+def stop_thinking():
+    """
+    Cancels the computer's search, if any, and waits for it to finish.
+    """
+    global worker
+    if worker is not None:
+        cancel.set()
+        worker.join()
+        worker = None
+
 
 user = None
-board = ttt.initial_state()
-ai_turn = False
+board = game.initial_state()
+clock = pygame.time.Clock()
+
+# Background search for the computer's move, and what it hands back
+worker = None
+cancel = threading.Event()
+moves = queue.Queue()
+think_time = None
 
 while True:
 
     for event in pygame.event.get():
         if event.type == pygame.QUIT:
+            stop_thinking()
+            if isinstance(game, mnk.Game):
+                game.close()
             sys.exit()
 
     screen.fill(black)
@@ -67,13 +152,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (columns / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(columns):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -89,12 +173,12 @@ while True:
                 row.append(rect)
             tiles.append(row)
 
-        game_over = ttt.terminal(board)
-        player = ttt.player(board)
+        game_over = game.terminal(board)
+        player = game.player(board)
 
         # Show title
         if game_over:
-            winner = ttt.winner(board)
+            winner = game.winner(board)
             if winner is None:
                 title = f"Game Over: Tie."
             else:
@@ -102,30 +186,47 @@ while True:
         elif user == player:
             title = f"Play as {user}"
         else:
-            title = f"Computer thinking..."
+            dots = "." * (int(time.perf_counter() * 2) % 3 + 1)
+            title = f"Computer thinking{dots:<3}"
         title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 30)
         screen.blit(title, titleRect)
 
-        # Check for AI move
+        # Show how long the computer took over its last move
+        if think_time is not None:
+            thought = smallFont.render(f"Computer: {think_time:.2f}s",
+                                       True, white)
+            thoughtRect = thought.get_rect()
+            thoughtRect.bottomleft = (10, height - 10)
+            screen.blit(thought, thoughtRect)
+
+        # Check for AI move, searched without blocking the window
         if user != player and not game_over:
-            if ai_turn:
-                time.sleep(0.5)
-                move = ttt.minimax(board)
-                board = ttt.result(board, move)
-                ai_turn = False
+            if worker is None:
+                cancel = threading.Event()
+                worker = threading.Thread(target=think,
+                                          args=(board, cancel, moves),
+                                          daemon=True)
+                worker.start()
             else:
-                ai_turn = True
+                try:
+                    searched, move, think_time = moves.get_nowait()
+                except queue.Empty:
+                    pass
+                else:
+                    worker = None
+                    if searched == board:
+                        board = game.result(board, move)
 
         # Check for a user move
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(columns):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
-                        board = ttt.result(board, (i, j))
+                        board = game.result(board, (i, j))
 
         if game_over:
             againButton = pygame.Rect(width / 3, height - 65, width / 3, 50)
@@ -139,8 +240,10 @@ while True:
                 mouse = pygame.mouse.get_pos()
                 if againButton.collidepoint(mouse):
                     time.sleep(0.2)
+                    stop_thinking()
                     user = None
-                    board = ttt.initial_state()
-                    ai_turn = False
+                    board = game.initial_state()
+                    think_time = None
 
     pygame.display.flip()
+    clock.tick(30)
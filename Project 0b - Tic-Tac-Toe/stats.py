@@ -0,0 +1,65 @@
+"""
+Search statistics
+
+A SearchStats records the work done by one top-level search, so the
+effect of pruning and caching changes can be measured.
+"""
+
+import time
+
+
+class SearchStats():
+    """
+    Counts of the work done by one search, and how long it took.
+    """
+
+    FIELDS = ("nodes", "terminal_checks", "cache_hits", "cache_misses",
+              "max_depth", "seconds")
+
+    def __init__(self):
+        self.nodes = 0
+        self.terminal_checks = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+        self.max_depth = 0
+        self.seconds = 0.0
+        self.start = None
+
+    def __str__(self):
+        return (f"{self.nodes} nodes, {self.terminal_checks} terminal "
+                f"checks, {self.cache_hits} cache hits, {self.cache_misses} "
+                f"cache misses, max depth {self.max_depth}, "
+                f"{self.seconds:.4f}s")
+
+    def begin(self):
+        """
+        Starts the clock.
+        """
+        self.start = time.perf_counter()
+        return self
+
+    def end(self):
+        """
+        Stops the clock, adding the time since begin() to the total.
+        """
+        self.seconds += time.perf_counter() - self.start
+        self.start = None
+        return self
+
+    def merge(self, other):
+        """
+        Adds in the counts of another search, such as one run by a worker,
+        keeping this search's time.
+        """
+        self.nodes += other.nodes
+        self.terminal_checks += other.terminal_checks
+        self.cache_hits += other.cache_hits
+        self.cache_misses += other.cache_misses
+        self.max_depth = max(self.max_depth, other.max_depth)
+        return self
+
+    def as_dict(self):
+        """
+        Returns the statistics as a dictionary.
+        """
+        return {field: getattr(self, field) for field in self.FIELDS}
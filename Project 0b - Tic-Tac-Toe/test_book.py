@@ -0,0 +1,56 @@
+import math
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import bitboard
+import book
+import tictactoe
+
+
+class TestLoad(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.addCleanup(self.directory.cleanup)
+        self.addCleanup(setattr, book, "table", book.table)
+        book.table = None
+
+    def test_shipped_table_is_intact(self):
+        # Equally good moves may be stored either way, but not values
+        with open(book.TABLE_PATH, "rb") as f:
+            shipped = f.read()
+        self.assertEqual([entry >> 4 for entry in shipped],
+                         [entry >> 4 for entry in book.build()])
+
+    def test_missing_table_is_cached_outside_source_tree(self):
+        directory = self.directory.name
+        shipped = os.path.join(directory, "source", "tictactoe.table")
+        cached = os.path.join(directory, "cache", "tictactoe.table")
+        with mock.patch.object(book, "TABLE_PATH", shipped), \
+                mock.patch.object(book, "CACHE_PATH", cached):
+            entries = book.load()
+            self.assertFalse(os.path.exists(shipped))
+            with open(cached, "rb") as f:
+                self.assertEqual(f.read(), entries)
+
+            # Later loads read the cached table back instead of rebuilding
+            with mock.patch.object(book, "build") as build:
+                self.assertEqual(book.load(), entries)
+                build.assert_not_called()
+
+    def test_lookup_matches_search(self):
+        stack = [(0, 0)]
+        for _ in range(200):
+            x, o = stack.pop(0)
+            if bitboard.terminal(x, o):
+                continue
+            value, _ = tictactoe.search(x, o, -math.inf, math.inf)
+            self.assertEqual(book.lookup(x, o)[0], value)
+            stack.extend(bitboard.play(x, o, move)
+                         for move in bitboard.moves(x, o))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import math
+import unittest
+from unittest import mock
+
+import mnk
+
+
+class _RisingBound():
+    """
+    Stands in for the shared best root value, taking the next of
+    `values` each time it is read.
+    """
+
+    def __init__(self, values):
+        self.values = list(values)
+
+    @property
+    def value(self):
+        if len(self.values) > 1:
+            return self.values.pop(0)
+        return self.values[0]
+
+
+class TestRootBound(unittest.TestCase):
+
+    def search(self, game, x, o, maximizing, depth, last):
+        return game._alphabeta(x, o, maximizing, depth, 1, -math.inf,
+                               math.inf, last)[0]
+
+    def check_rising_bound(self, size, x, o, maximizing, depth):
+        """
+        Searches each root move while the root bound rises past its
+        value, checking that results the bound cut short are bounds on
+        the true value and that the rest, and the table left behind,
+        give it exactly.
+        """
+        clean = mnk.Game(*size, workers=1)
+        game = mnk.Game(*size, workers=1)
+        sign = 1 if maximizing else -1
+        occupied = x | o
+        for cell in game.order:
+            if occupied >> cell & 1:
+                continue
+            child = (x | 1 << cell, o) if maximizing else (x, o | 1 << cell)
+            true = self.search(clean, *child, not maximizing, depth, cell)
+            for start in (-60, -20, -8, 0, 8):
+                bound = sign * true
+                game.root_bound = _RisingBound(
+                    range(bound + start, bound + start + 160, 16))
+                game.root_sign = sign
+                game.floor, game.ceiling = -math.inf, math.inf
+                game._read_root_bound()
+                value = self.search(game, *child, not maximizing, depth, cell)
+                final = game.floor if maximizing else -game.ceiling
+                if sign * value > final:
+                    self.assertEqual(value, true)
+                else:
+                    self.assertLessEqual(sign * true, sign * value)
+
+            game.root_bound = None
+            game.floor, game.ceiling = -math.inf, math.inf
+            self.assertEqual(
+                self.search(game, *child, not maximizing, depth, cell), true)
+
+    @mock.patch.object(mnk, "CHECK_INTERVAL", 1)
+    def test_rising_bound_when_maximizing(self):
+        for size in ((4, 4, 3), (3, 4, 3)):
+            for depth in (3, 4):
+                self.check_rising_bound(size, 0, 0, True, depth)
+
+    @mock.patch.object(mnk, "CHECK_INTERVAL", 1)
+    def test_rising_bound_when_minimizing(self):
+        for size in ((3, 4, 3), (4, 4, 4)):
+            for depth in (3, 4):
+                self.check_rising_bound(size, 1 << 5, 0, False, depth)
+
+
+if __name__ == "__main__":
+    unittest.main()
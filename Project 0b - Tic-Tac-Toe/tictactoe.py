@@ -2,7 +2,11 @@
 Tic Tac Toe Player
 """
 
-from copy import deepcopy
+import math
+
+import bitboard
+import book
+from stats import SearchStats
 
 X = "X"
 O = "O"
@@ -22,219 +26,199 @@ def player(board):
     """
     Returns player who has the next turn on a board.
     """
-
-    x_count = 0
-    o_count = 0
-
-    for row in board:
-        for state in row:
-            if state == X:
-                x_count += 1
-            elif state == O:
-                o_count += 1
-
-    if x_count <= o_count:
-        return X
-    return O
+    return X if bitboard.x_to_move(*position(board)) else O
 
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    action_set = set()
-    y_coordinate = 0
-    x_coordinate = 0
-
-    for row in board:
-        y_coordinate = 0
-        for state in row:
-            if state == EMPTY:
-                action_set.add((x_coordinate, y_coordinate))
-            y_coordinate += 1
-        x_coordinate += 1
-
-    return action_set
+    return {bitboard.to_action(bit) for bit in bitboard.moves(*position(board))}
 
 
 def result(board, action):
     """
     Returns the board that results from making move (i, j) on the board.
     """
-    new_board = deepcopy(board)
-
-    if not (0 <= action[0] < 3) and (0 <= action[0] < 3):
+    if not (0 <= action[0] < 3 and 0 <= action[1] < 3):
         raise Exception("Invalid move - out of bounds")
 
-    if new_board[action[0]][action[1]] is not EMPTY:
+    x, o = position(board)
+    bit = bitboard.to_bit(action)
+    if (x | o) & bit:
         raise Exception("Invalid move - field already filled")
 
-    new_board[action[0]][action[1]] = player(board)
-
-    return new_board
+    return to_board(*bitboard.play(x, o, bit))
 
 
 def winner(board):
     """
     Returns the winner of the game, if there is one.
     """
-
-    # check rows
-    x = 0
-    y = 0
-
-    win_counter = 0
-    while x < 3 and y < 3:
-        state = board[y][x]
-        if state == X:
-            win_counter += 1
-        elif state == O:
-            win_counter -= 1
-        if win_counter == 3:
-            return X
-        elif win_counter == -3:
-            return O
-        x += 1
-        if x == 3:
-            x = 0
-            y += 1
-            win_counter = 0
-
-    # check columns
-    x = 0
-    y = 0
-
-    win_counter = 0
-    while x < 3 and y < 3:
-        state = board[x][y]
-        if state == X:
-            win_counter += 1
-        elif state == O:
-            win_counter -= 1
-        if win_counter == 3:
-            return X
-        elif win_counter == -3:
-            return O
-        x += 1
-        if x == 3:
-            x = 0
-            y += 1
-            win_counter = 0
-
-    # check diagonals
-    x = 0
-    y = 0
-    win_counter = 0
-    while x < 3 and y < 3:
-        state = board[x][y]
-        if state == X:
-            win_counter += 1
-        elif state == O:
-            win_counter -= 1
-        if win_counter == 3:
-            return X
-        elif win_counter == -3:
-            return O
-        x += 1
-        y += 1
-
-    x = 0
-    y = 2
-    win_counter = 0
-    while x < 3 and y >= 0:
-        state = board[x][y]
-        if state == X:
-            win_counter += 1
-        elif state == O:
-            win_counter -= 1
-        if win_counter == 3:
-            return X
-        elif win_counter == -3:
-            return O
-        x += 1
-        y -= 1
-
-    return None
+    return WINNERS[bitboard.winner(*position(board))]
 
 
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    if winner(board) is not None:
-        return True
-
-    for x in range(3):
-        for y in range(3):
-            if board[x][y] == EMPTY:
-                return False
-
-    return True
+    return bitboard.terminal(*position(board))
 
 
 def utility(board):
     """
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
-    if winner(board) == X:
-        return 1
-    elif winner(board) == O:
-        return -1
-    else:
-        return 0
+    return bitboard.winner(*position(board))
 
 
-def minimax(board):
+def position(board):
     """
-    Returns the optimal action for the current player on the board. TODO
+    Returns the (x, o) bitboard position of a list-of-lists board.
     """
-    current_player = player(board)
+    return bitboard.from_board(board, X, O)
 
-    next_action = None
-    if terminal(board):
-        return next_action
 
-    # If X, maximize
-    if current_player == X:
-        value = -10
-        for action in actions(board):
-            option = min_value(result(board, action))
-            if option > value:
-                value = option
-                next_action = action
-
-    # If O, minimize
-    elif player(board) == O:
-        value = 10
-        for action in actions(board):
-            option = max_value(result(board, action))
-            if option < value:
-                value = option
-                next_action = action
-    return next_action
+def to_board(x, o):
+    """
+    Returns the list-of-lists board of an (x, o) bitboard position.
+    """
+    return bitboard.to_board(x, o, X, O, EMPTY)
 
 
-def min_value(board):
-    if terminal(board):
-        return utility(board)
+# Players by bitboard winner value
+WINNERS = {1: X, -1: O, 0: None}
+
+
+# Transposition table: canonical (x, o) position -> (value, bound, best
+# move bit in the canonical orientation)
+transpositions = {}
+
+# Kinds of bound a stored value is, relative to the true minimax value
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Work done by the last call to minimax
+stats = SearchStats()
+
+
+def minimax(board):
+    """
+    Returns the optimal action for the current player on the board.
+
+    Reachable boards are looked up in the perfect-play table; any others
+    are searched. The work done is recorded in `stats`.
+    """
+    global stats
+    stats = SearchStats().begin()
+    x, o = position(board)
+    stats.terminal_checks += 1
+    if bitboard.terminal(x, o):
+        stats.end()
+        return None
+    entry = book.lookup(x, o)
+    if entry is None:
+        stats.cache_misses += 1
+        entry = search(x, o, -math.inf, math.inf)
     else:
-        value = 10
-        for action in actions(board):
-            option = max_value(result(board, action))
-            if option < value:
-                value = option
+        stats.cache_hits += 1
+    stats.end()
+    return bitboard.to_action(entry[1])
+
+
+def alphabeta(board, alpha, beta):
+    """
+    Returns (value, action) for the current player on the board, searched
+    with alpha-beta pruning inside the (alpha, beta) window.
+    """
+    value, bit = search(*position(board), alpha, beta)
+    return value, None if bit is None else bitboard.to_action(bit)
+
 
-    return value
+def search(x, o, alpha, beta, ply=0):
+    """
+    Returns (value, move bit) for the player to move in bitboard position
+    (x, o), `ply` moves below the root, searched with alpha-beta pruning
+    inside the (alpha, beta) window. Positions are memoized in the
+    transposition table with the kind of bound found, one entry for all
+    rotations and reflections.
+    """
+    stats.nodes += 1
+    if ply > stats.max_depth:
+        stats.max_depth = ply
 
+    # Score finished games with two table lookups
+    stats.terminal_checks += 1
+    game_winner = bitboard.winner(x, o)
+    if game_winner:
+        return game_winner, None
 
-def max_value(board):
-    if terminal(board):
-        return utility(board)
+    canonical_x, canonical_o, symmetry = bitboard.canonical(x, o)
+    key = (canonical_x, canonical_o)
+    entry = transpositions.get(key)
+    best_move = None
+    if entry is None:
+        stats.cache_misses += 1
     else:
-        value = -10
-        for action in actions(board):
-            option = min_value(result(board, action))
+        stats.cache_hits += 1
+        value, bound, best_move = entry
+        best_move = bitboard.untransform(best_move, symmetry)
+        if bound == EXACT:
+            return value, best_move
+        elif bound == LOWER:
+            alpha = max(alpha, value)
+        else:
+            beta = min(beta, value)
+        if alpha >= beta:
+            return value, best_move
+
+    moves = bitboard.moves(x, o)
+    if not moves:
+        return 0, None
+
+    # Try the best move from an earlier search first
+    if best_move in moves:
+        moves.remove(best_move)
+        moves.insert(0, best_move)
+
+    original_alpha, original_beta = alpha, beta
+    maximizing = bitboard.x_to_move(x, o)
+    value = -math.inf if maximizing else math.inf
+    for move in moves:
+        if maximizing:
+            option = search(x | move, o, alpha, beta, ply + 1)[0]
             if option > value:
-                value = option
+                value, best_move = option, move
+            alpha = max(alpha, value)
+        else:
+            option = search(x, o | move, alpha, beta, ply + 1)[0]
+            if option < value:
+                value, best_move = option, move
+            beta = min(beta, value)
+        if alpha >= beta:
+            break
+
+    if value <= original_alpha:
+        bound = UPPER
+    elif value >= original_beta:
+        bound = LOWER
+    else:
+        bound = EXACT
+    transpositions[key] = (value, bound,
+                           bitboard.transform(best_move, symmetry))
+    return value, best_move
+
 
-    return value
+def min_value(board):
+    """
+    Returns the minimax value of a board where O is to move.
+    """
+    return search(*position(board), -math.inf, math.inf)[0]
+
+
+def max_value(board):
+    """
+    Returns the minimax value of a board where X is to move.
+    """
+    return search(*position(board), -math.inf, math.inf)[0]
@@ -1,7 +1,47 @@
 import itertools
+import weakref
+
+from sat import CNF
+
+# Models evaluated at once by bitwise model checking are 2 ** BLOCK_BITS
+BLOCK_BITS = 16
 
 
 class Sentence():
+    """A logical sentence. Sentences are immutable and hash-consed:
+    constructing one equal to a sentence that already exists returns that
+    same node, so equality is identity, and each node computes its hash,
+    symbols and formula once."""
+
+    __slots__ = ("_arguments", "_hash", "_symbols", "_formula", "_compiled",
+                 "__weakref__")
+
+    # Every live sentence, by class and constructor arguments
+    _interned = weakref.WeakValueDictionary()
+
+    @classmethod
+    def intern(cls, arguments, **fields):
+        """Returns the existing node of this class built from the tuple of
+        constructor arguments, or else a new one with the given fields."""
+        node = Sentence._interned.get((cls, arguments))
+        if node is None:
+            node = object.__new__(cls)
+            for name, value in fields.items():
+                setattr(node, name, value)
+            node._arguments = arguments
+            node._hash = hash((cls.__name__, arguments))
+            node._symbols = None
+            node._formula = None
+            node._compiled = None
+            Sentence._interned[(cls, arguments)] = node
+        return node
+
+    def __hash__(self):
+        return self._hash
+
+    def __reduce__(self):
+        # Copies and unpickled sentences are rebuilt, and so interned, too
+        return type(self), self._arguments
 
     def evaluate(self, model):
         """Evaluates the logical sentence."""
@@ -9,11 +49,67 @@ class Sentence():
 
     def formula(self):
         """Returns string formula representing logical sentence."""
+        if self._formula is None:
+            self._formula = self.make_formula()
+        return self._formula
+
+    def make_formula(self):
+        """Builds the string formula, which formula() then caches."""
         return ""
 
     def symbols(self):
         """Returns a set of all symbols in the logical sentence."""
-        return set()
+        return set(self.symbol_set())
+
+    def symbol_set(self):
+        """Returns a frozen set of all symbols in the logical sentence,
+        found once and then cached."""
+        if self._symbols is None:
+            self._symbols = self.find_symbols()
+        return self._symbols
+
+    def find_symbols(self):
+        """Finds the frozen set of symbols, which symbol_set() caches."""
+        return frozenset()
+
+    def encode(self, cnf):
+        """Adds Tseitin clauses for the sentence to a CNF and returns the
+        literal that is true exactly when the sentence is."""
+        raise Exception("nothing to encode")
+
+    def expression(self, index):
+        """Returns Python source evaluating the sentence over a bitmask
+        `model`, in which bit index[name] holds the symbol's value."""
+        raise Exception("nothing to compile")
+
+    def bitwise(self, index):
+        """Returns Python source evaluating the sentence over many models
+        at once: bit m of the result is its value in model m, given each
+        symbol's values as `columns[index[name]]` and all models' bits
+        set in `full`."""
+        raise Exception("nothing to compile")
+
+    def compile(self, symbols, bitwise=False):
+        """Returns a function evaluating the sentence over a bitmask
+        model, bit i holding the value of symbols[i], or if bitwise is
+        True over (columns, full) as described for bitwise(). Functions
+        are cached on the sentence for each order of symbols."""
+        key = (tuple(symbols), bitwise)
+        if self._compiled is None:
+            self._compiled = {}
+        compiled = self._compiled
+        if key not in compiled:
+            index = {name: i for i, name in enumerate(symbols)}
+            if bitwise:
+                source = f"lambda columns, full: {self.bitwise(index)}"
+            else:
+                source = f"lambda model: {self.expression(index)}"
+            compiled[key] = eval(source, {"__builtins__": {}})
+        return compiled[key]
+
+    def add_clauses(self, cnf):
+        """Adds clauses to a CNF that hold exactly when the sentence does."""
+        cnf.add(self.encode(cnf))
 
     @classmethod
     def validate(cls, sentence):
@@ -43,15 +139,10 @@ class Sentence():
 
 
 class Symbol(Sentence):
+    __slots__ = ("name",)
 
-    def __init__(self, name):
-        self.name = name
-
-    def __eq__(self, other):
-        return isinstance(other, Symbol) and self.name == other.name
-
-    def __hash__(self):
-        return hash(("symbol", self.name))
+    def __new__(cls, name):
+        return cls.intern((name,), name=name)
 
     def __repr__(self):
         return self.name
@@ -62,23 +153,34 @@ class Symbol(Sentence):
         except KeyError:
             raise Exception(f"variable {self.name} not in model")
 
-    def formula(self):
+    def make_formula(self):
         return self.name
 
-    def symbols(self):
-        return {self.name}
+    def find_symbols(self):
+        return frozenset([self.name])
 
+    def encode(self, cnf):
+        return cnf.variable(self.name)
 
-class Not(Sentence):
-    def __init__(self, operand):
-        Sentence.validate(operand)
-        self.operand = operand
+    def expression(self, index):
+        try:
+            return f"(model >> {index[self.name]} & 1 == 1)"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
-    def __eq__(self, other):
-        return isinstance(other, Not) and self.operand == other.operand
+    def bitwise(self, index):
+        try:
+            return f"columns[{index[self.name]}]"
+        except KeyError:
+            raise Exception(f"variable {self.name} not in model")
 
-    def __hash__(self):
-        return hash(("not", hash(self.operand)))
+
+class Not(Sentence):
+    __slots__ = ("operand",)
+
+    def __new__(cls, operand):
+        Sentence.validate(operand)
+        return cls.intern((operand,), operand=operand)
 
     def __repr__(self):
         return f"Not({self.operand})"
@@ -86,26 +188,29 @@ class Not(Sentence):
     def evaluate(self, model):
         return not self.operand.evaluate(model)
 
-    def formula(self):
+    def make_formula(self):
         return "¬" + Sentence.parenthesize(self.operand.formula())
 
-    def symbols(self):
-        return self.operand.symbols()
+    def find_symbols(self):
+        return self.operand.symbol_set()
+
+    def encode(self, cnf):
+        return -self.operand.encode(cnf)
+
+    def expression(self, index):
+        return f"(not {self.operand.expression(index)})"
+
+    def bitwise(self, index):
+        return f"(full ^ {self.operand.bitwise(index)})"
 
 
 class And(Sentence):
-    def __init__(self, *conjuncts):
+    __slots__ = ("conjuncts",)
+
+    def __new__(cls, *conjuncts):
         for conjunct in conjuncts:
             Sentence.validate(conjunct)
-        self.conjuncts = list(conjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, And) and self.conjuncts == other.conjuncts
-
-    def __hash__(self):
-        return hash(
-            ("and", tuple(hash(conjunct) for conjunct in self.conjuncts))
-        )
+        return cls.intern(conjuncts, conjuncts=conjuncts)
 
     def __repr__(self):
         conjunctions = ", ".join(
@@ -114,35 +219,60 @@ class And(Sentence):
         return f"And({conjunctions})"
 
     def add(self, conjunct):
+        """Returns the conjunction with one more conjunct. Sentences are
+        immutable, so use it as `knowledge = knowledge.add(conjunct)`."""
         Sentence.validate(conjunct)
-        self.conjuncts.append(conjunct)
+        return And(*self.conjuncts, conjunct)
 
     def evaluate(self, model):
         return all(conjunct.evaluate(model) for conjunct in self.conjuncts)
 
-    def formula(self):
+    def make_formula(self):
         if len(self.conjuncts) == 1:
             return self.conjuncts[0].formula()
         return " ∧ ".join([Sentence.parenthesize(conjunct.formula())
                            for conjunct in self.conjuncts])
 
-    def symbols(self):
-        return set.union(*[conjunct.symbols() for conjunct in self.conjuncts])
+    def find_symbols(self):
+        return frozenset().union(
+            *[conjunct.symbol_set() for conjunct in self.conjuncts]
+        )
+
+    def encode(self, cnf):
+        literals = [conjunct.encode(cnf) for conjunct in self.conjuncts]
+        if len(literals) == 1:
+            return literals[0]
+        gate = cnf.variable()
+        for literal in literals:
+            cnf.add(-gate, literal)
+        cnf.add(gate, *[-literal for literal in literals])
+        return gate
+
+    def add_clauses(self, cnf):
+        for conjunct in self.conjuncts:
+            conjunct.add_clauses(cnf)
+
+    def expression(self, index):
+        if not self.conjuncts:
+            return "True"
+        return "(" + " and ".join(
+            conjunct.expression(index) for conjunct in self.conjuncts
+        ) + ")"
+
+    def bitwise(self, index):
+        if not self.conjuncts:
+            return "full"
+        return balanced("&", [conjunct.bitwise(index)
+                              for conjunct in self.conjuncts])
 
 
 class Or(Sentence):
-    def __init__(self, *disjuncts):
+    __slots__ = ("disjuncts",)
+
+    def __new__(cls, *disjuncts):
         for disjunct in disjuncts:
             Sentence.validate(disjunct)
-        self.disjuncts = list(disjuncts)
-
-    def __eq__(self, other):
-        return isinstance(other, Or) and self.disjuncts == other.disjuncts
-
-    def __hash__(self):
-        return hash(
-            ("or", tuple(hash(disjunct) for disjunct in self.disjuncts))
-        )
+        return cls.intern(disjuncts, disjuncts=disjuncts)
 
     def __repr__(self):
         disjuncts = ", ".join([str(disjunct) for disjunct in self.disjuncts])
@@ -151,30 +281,52 @@ class Or(Sentence):
     def evaluate(self, model):
         return any(disjunct.evaluate(model) for disjunct in self.disjuncts)
 
-    def formula(self):
+    def make_formula(self):
         if len(self.disjuncts) == 1:
             return self.disjuncts[0].formula()
         return " ∨  ".join([Sentence.parenthesize(disjunct.formula())
                             for disjunct in self.disjuncts])
 
-    def symbols(self):
-        return set.union(*[disjunct.symbols() for disjunct in self.disjuncts])
+    def find_symbols(self):
+        return frozenset().union(
+            *[disjunct.symbol_set() for disjunct in self.disjuncts]
+        )
+
+    def encode(self, cnf):
+        literals = [disjunct.encode(cnf) for disjunct in self.disjuncts]
+        if len(literals) == 1:
+            return literals[0]
+        gate = cnf.variable()
+        for literal in literals:
+            cnf.add(gate, -literal)
+        cnf.add(-gate, *literals)
+        return gate
+
+    def add_clauses(self, cnf):
+        cnf.add(*[disjunct.encode(cnf) for disjunct in self.disjuncts])
+
+    def expression(self, index):
+        if not self.disjuncts:
+            return "False"
+        return "(" + " or ".join(
+            disjunct.expression(index) for disjunct in self.disjuncts
+        ) + ")"
+
+    def bitwise(self, index):
+        if not self.disjuncts:
+            return "0"
+        return balanced("|", [disjunct.bitwise(index)
+                              for disjunct in self.disjuncts])
 
 
 class Implication(Sentence):
-    def __init__(self, antecedent, consequent):
+    __slots__ = ("antecedent", "consequent")
+
+    def __new__(cls, antecedent, consequent):
         Sentence.validate(antecedent)
         Sentence.validate(consequent)
-        self.antecedent = antecedent
-        self.consequent = consequent
-
-    def __eq__(self, other):
-        return (isinstance(other, Implication)
-                and self.antecedent == other.antecedent
-                and self.consequent == other.consequent)
-
-    def __hash__(self):
-        return hash(("implies", hash(self.antecedent), hash(self.consequent)))
+        return cls.intern((antecedent, consequent), antecedent=antecedent,
+                          consequent=consequent)
 
     def __repr__(self):
         return f"Implication({self.antecedent}, {self.consequent})"
@@ -183,29 +335,44 @@ class Implication(Sentence):
         return ((not self.antecedent.evaluate(model))
                 or self.consequent.evaluate(model))
 
-    def formula(self):
+    def make_formula(self):
         antecedent = Sentence.parenthesize(self.antecedent.formula())
         consequent = Sentence.parenthesize(self.consequent.formula())
         return f"{antecedent} => {consequent}"
 
-    def symbols(self):
-        return set.union(self.antecedent.symbols(), self.consequent.symbols())
+    def find_symbols(self):
+        return self.antecedent.symbol_set() | self.consequent.symbol_set()
+
+    def encode(self, cnf):
+        antecedent = self.antecedent.encode(cnf)
+        consequent = self.consequent.encode(cnf)
+        gate = cnf.variable()
+        cnf.add(-gate, -antecedent, consequent)
+        cnf.add(gate, antecedent)
+        cnf.add(gate, -consequent)
+        return gate
+
+    def add_clauses(self, cnf):
+        cnf.add(-self.antecedent.encode(cnf), self.consequent.encode(cnf))
+
+    def expression(self, index):
+        antecedent = self.antecedent.expression(index)
+        consequent = self.consequent.expression(index)
+        return f"(not {antecedent} or {consequent})"
+
+    def bitwise(self, index):
+        antecedent = self.antecedent.bitwise(index)
+        consequent = self.consequent.bitwise(index)
+        return f"((full ^ {antecedent}) | {consequent})"
 
 
 class Biconditional(Sentence):
-    def __init__(self, left, right):
+    __slots__ = ("left", "right")
+
+    def __new__(cls, left, right):
         Sentence.validate(left)
         Sentence.validate(right)
-        self.left = left
-        self.right = right
-
-    def __eq__(self, other):
-        return (isinstance(other, Biconditional)
-                and self.left == other.left
-                and self.right == other.right)
-
-    def __hash__(self):
-        return hash(("biconditional", hash(self.left), hash(self.right)))
+        return cls.intern((left, right), left=left, right=right)
 
     def __repr__(self):
         return f"Biconditional({self.left}, {self.right})"
@@ -216,48 +383,128 @@ class Biconditional(Sentence):
                 or (not self.left.evaluate(model)
                     and not self.right.evaluate(model)))
 
-    def formula(self):
+    def make_formula(self):
         left = Sentence.parenthesize(str(self.left))
         right = Sentence.parenthesize(str(self.right))
         return f"{left} <=> {right}"
 
-    def symbols(self):
-        return set.union(self.left.symbols(), self.right.symbols())
-
-
-def model_check(knowledge, query):
-    """Checks if knowledge base entails query."""
-
-    def check_all(knowledge, query, symbols, model):
-        """Checks if knowledge base entails query, given a particular model."""
+    def find_symbols(self):
+        return self.left.symbol_set() | self.right.symbol_set()
+
+    def encode(self, cnf):
+        left = self.left.encode(cnf)
+        right = self.right.encode(cnf)
+        gate = cnf.variable()
+        cnf.add(-gate, -left, right)
+        cnf.add(-gate, left, -right)
+        cnf.add(gate, left, right)
+        cnf.add(gate, -left, -right)
+        return gate
+
+    def add_clauses(self, cnf):
+        left = self.left.encode(cnf)
+        right = self.right.encode(cnf)
+        cnf.add(-left, right)
+        cnf.add(left, -right)
+
+    def expression(self, index):
+        left = self.left.expression(index)
+        right = self.right.expression(index)
+        return f"({left} == {right})"
+
+    def bitwise(self, index):
+        left = self.left.bitwise(index)
+        right = self.right.bitwise(index)
+        return f"(full ^ {left} ^ {right})"
+
+
+def balanced(operator, operands):
+    """Joins Python source operands with a binary operator as a balanced
+    tree, since a flat chain compiles to operations nested as deep as it
+    is long, which overflows the compiler's recursion limit."""
+    while len(operands) > 1:
+        operands = [
+            f"({operands[i]} {operator} {operands[i + 1]})"
+            if i + 1 < len(operands) else operands[i]
+            for i in range(0, len(operands), 2)
+        ]
+    return operands[0]
+
+
+def model_check(knowledge, query, method="sat"):
+    """Checks if knowledge base entails query.
+
+    By default this asks a SAT solver whether the knowledge base and the
+    negated query together are unsatisfiable; with method "enumerate" it
+    tries every model instead, and with method "bitwise" it tries blocks
+    of models at once, one bit per model.
+    """
+    if method == "sat":
+        cnf = CNF()
+        knowledge.add_clauses(cnf)
+        Not(query).add_clauses(cnf)
+        return not cnf.satisfiable()
+    elif method == "bitwise":
+        symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
+        knowledge = knowledge.compile(symbols, bitwise=True)
+        query = query.compile(symbols, bitwise=True)
+
+        # Entailment fails if any model has knowledge true and query false
+        for columns, full in model_blocks(len(symbols)):
+            if knowledge(columns, full) & ~query(columns, full):
+                return False
+        return True
+    elif method != "enumerate":
+        raise ValueError(f"unknown model checking method: {method}")
+
+    def check_all(knowledge, query, count, model):
+        """Checks if knowledge base entails query, given a particular model
+        whose first `count` symbols are still unassigned."""
 
         # If model has an assignment for each symbol
-        if not symbols:
+        if not count:
 
             # If knowledge base is true in model, then query must also be true
-            if knowledge.evaluate(model):
-                return query.evaluate(model)
+            if knowledge(model):
+                return query(model)
             return True
         else:
 
-            # Choose one of the remaining unused symbols
-            remaining = symbols.copy()
-            p = remaining.pop()
-
-            # Create a model where the symbol is true
-            model_true = model.copy()
-            model_true[p] = True
-
-            # Create a model where the symbol is false
-            model_false = model.copy()
-            model_false[p] = False
+            # Choose the next unused symbol
+            count -= 1
 
-            # Ensure entailment holds in both models
-            return (check_all(knowledge, query, remaining, model_true) and
-                    check_all(knowledge, query, remaining, model_false))
+            # Ensure entailment holds with the symbol true and false
+            return (check_all(knowledge, query, count, model | 1 << count) and
+                    check_all(knowledge, query, count, model))
 
-    # Get all symbols in both knowledge and query
-    symbols = set.union(knowledge.symbols(), query.symbols())
+    # Get all symbols in both knowledge and query, one bit of the model each
+    symbols = sorted(set.union(knowledge.symbols(), query.symbols()))
 
     # Check that knowledge entails query
-    return check_all(knowledge, query, symbols, dict())
+    return check_all(knowledge.compile(symbols), query.compile(symbols),
+                     len(symbols), 0)
+
+
+def model_blocks(count, block_bits=BLOCK_BITS):
+    """Yields (columns, full) for every block of up to 2 ** block_bits
+    models over `count` symbols. Bit m of columns[i] is the value of
+    symbol i in model m of the block, and full has every model's bit set.
+    """
+    bits = min(count, block_bits)
+    size = 1 << bits
+    full = (1 << size) - 1
+
+    # Symbols below `bits` alternate within a block, runs of 2 ** i
+    # false then true models, repeated across the block
+    columns = []
+    for i in range(bits):
+        run = 1 << i
+        repeat = full // ((1 << 2 * run) - 1)
+        columns.append((((1 << run) - 1) << run) * repeat)
+
+    # The rest hold one value across each block
+    columns.extend([0] * (count - bits))
+    for block in range(1 << (count - bits)):
+        for i in range(bits, count):
+            columns[i] = full if block >> (i - bits) & 1 else 0
+        yield columns, full
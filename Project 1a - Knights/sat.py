@@ -0,0 +1,318 @@
+"""
+CNF formulas and a conflict-driven clause learning SAT solver.
+
+Literals are non-zero integers as in DIMACS: variable v is the literal v,
+and its negation -v. Sentences from logic.py encode themselves into a
+CNF through their `encode` and `add_clauses` methods.
+"""
+
+import heapq
+
+# Conflicts before the first restart, and how much the gap then grows
+RESTART_FIRST = 100
+RESTART_GROWTH = 1.5
+
+# How fast variable activity from older conflicts fades
+ACTIVITY_DECAY = 0.95
+
+
+class CNF():
+    """
+    A conjunction of clauses over symbol and Tseitin gate variables.
+    """
+
+    def __init__(self):
+        self.variables = {}
+        self.count = 0
+        self.clauses = []
+
+    def variable(self, name=None):
+        """
+        Returns the variable of the named symbol, or a new unnamed
+        variable for a gate if name is None.
+        """
+        if name is None:
+            self.count += 1
+            return self.count
+        if name not in self.variables:
+            self.count += 1
+            self.variables[name] = self.count
+        return self.variables[name]
+
+    def add(self, *literals):
+        """
+        Adds the clause that at least one of the literals holds.
+        """
+        self.clauses.append(literals)
+
+    def solve(self):
+        """
+        Returns a model of the formula, mapping symbol names to truth
+        values, or None if it is unsatisfiable.
+        """
+        solver = Solver(self.count)
+        for clause in self.clauses:
+            if not solver.add_clause(clause):
+                return None
+        if not solver.solve():
+            return None
+        return {name: solver.value(variable)
+                for name, variable in self.variables.items()}
+
+    def satisfiable(self):
+        """
+        Returns True if some model makes every clause true.
+        """
+        return self.solve() is not None
+
+
+class Solver():
+    """
+    A CDCL SAT solver: two watched literals per clause for unit
+    propagation, first-UIP clause learning with backjumping, VSIDS
+    branching with saved phases, and geometric restarts.
+
+    Internally literal v is coded 2 * v and literal -v is 2 * v + 1, so
+    the code of a literal's negation is its code ^ 1.
+    """
+
+    def __init__(self, variables):
+        self.variables = variables
+        size = 2 * (variables + 1)
+
+        # Truth value of each literal code, None while unassigned
+        self.values = [None] * size
+        self.watches = [[] for _ in range(size)]
+        self.levels = [0] * (variables + 1)
+        self.reasons = [None] * (variables + 1)
+        self.phases = [False] * (variables + 1)
+
+        self.trail = []
+        self.trail_limits = []
+        self.head = 0
+        self.unsatisfiable = False
+
+        self.activity = [0.0] * (variables + 1)
+        self.increment = 1.0
+        self.order = [(0.0, variable) for variable in range(1, variables + 1)]
+
+    def add_clause(self, literals):
+        """
+        Adds a clause of DIMACS literals before solving. Returns False
+        if the formula is now known to be unsatisfiable.
+        """
+        if self.unsatisfiable:
+            return False
+        clause = []
+        for literal in literals:
+            code = _code(literal)
+            if code ^ 1 in clause:
+                return True
+            if code not in clause:
+                clause.append(code)
+
+        # Drop literals already false, and clauses already true, at level 0
+        clause = [code for code in clause if self.values[code] is not False]
+        if any(self.values[code] for code in clause):
+            return True
+        if not clause:
+            self.unsatisfiable = True
+            return False
+        if len(clause) == 1:
+            self._assign(clause[0], None)
+            if self._propagate() is not None:
+                self.unsatisfiable = True
+                return False
+            return True
+        self._watch(clause)
+        return True
+
+    def solve(self):
+        """
+        Returns True if the clauses are satisfiable, leaving a model
+        that value() reads.
+        """
+        if self.unsatisfiable:
+            return False
+
+        conflicts = 0
+        restart_at = RESTART_FIRST
+        while True:
+            conflict = self._propagate()
+            if conflict is not None:
+                if not self.trail_limits:
+                    self.unsatisfiable = True
+                    return False
+                learned, level = self._analyze(conflict)
+                self._backtrack(level)
+                if len(learned) == 1:
+                    self._assign(learned[0], None)
+                else:
+                    self._watch(learned)
+                    self._assign(learned[0], learned)
+                self.increment /= ACTIVITY_DECAY
+
+                conflicts += 1
+                if conflicts >= restart_at:
+                    restart_at += int(restart_at * RESTART_GROWTH)
+                    self._backtrack(0)
+                continue
+
+            variable = self._pick()
+            if variable is None:
+                return True
+            self.trail_limits.append(len(self.trail))
+            self._assign(2 * variable + (not self.phases[variable]), None)
+
+    def value(self, variable):
+        """
+        Returns the truth value of a variable in the model found.
+        """
+        return bool(self.values[2 * variable])
+
+    def _watch(self, clause):
+        self.watches[clause[0]].append(clause)
+        self.watches[clause[1]].append(clause)
+
+    def _assign(self, code, reason):
+        variable = code >> 1
+        self.values[code] = True
+        self.values[code ^ 1] = False
+        self.levels[variable] = len(self.trail_limits)
+        self.reasons[variable] = reason
+        self.trail.append(code)
+
+    def _propagate(self):
+        """
+        Assigns every literal forced by a unit clause. Returns a clause
+        made false, or None if there is no conflict.
+        """
+        values = self.values
+        watches = self.watches
+        trail = self.trail
+        while self.head < len(trail):
+            false = trail[self.head] ^ 1
+            self.head += 1
+
+            # Clauses watching the literal just made false either find
+            # another literal to watch, become unit, or conflict
+            watching = watches[false]
+            watches[false] = kept = []
+            for i, clause in enumerate(watching):
+                if clause[0] == false:
+                    clause[0], clause[1] = clause[1], false
+                first = clause[0]
+                if values[first]:
+                    kept.append(clause)
+                    continue
+
+                for k in range(2, len(clause)):
+                    code = clause[k]
+                    if values[code] is not False:
+                        clause[1], clause[k] = code, false
+                        watches[code].append(clause)
+                        break
+                else:
+                    kept.append(clause)
+                    if values[first] is False:
+                        kept.extend(watching[i + 1:])
+                        self.head = len(trail)
+                        return clause
+                    self._assign(first, clause)
+        return None
+
+    def _analyze(self, conflict):
+        """
+        Returns the first-UIP clause learned from a conflict, asserting
+        literal first and highest other level second, and the level to
+        jump back to.
+        """
+        levels = self.levels
+        level = len(self.trail_limits)
+        seen = set()
+        learned = [None]
+        pending = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        code = None
+        while True:
+            for other in (clause if code is None else clause[1:]):
+                variable = other >> 1
+                if variable in seen or levels[variable] == 0:
+                    continue
+                seen.add(variable)
+                self._bump(variable)
+                if levels[variable] == level:
+                    pending += 1
+                else:
+                    learned.append(other)
+
+            # Resolve on the latest literal of this level in the conflict
+            while self.trail[index] >> 1 not in seen:
+                index -= 1
+            code = self.trail[index]
+            index -= 1
+            pending -= 1
+            if pending == 0:
+                break
+            clause = self.reasons[code >> 1]
+
+        learned[0] = code ^ 1
+        if len(learned) == 1:
+            return learned, 0
+        highest = max(range(1, len(learned)),
+                      key=lambda i: levels[learned[i] >> 1])
+        learned[1], learned[highest] = learned[highest], learned[1]
+        return learned, levels[learned[1] >> 1]
+
+    def _backtrack(self, level):
+        """
+        Undoes every assignment made above the given decision level.
+        """
+        if len(self.trail_limits) <= level:
+            return
+        start = self.trail_limits[level]
+        for code in self.trail[start:]:
+            variable = code >> 1
+            self.phases[variable] = not code & 1
+            self.values[code] = self.values[code ^ 1] = None
+            self.reasons[variable] = None
+            heapq.heappush(self.order, (-self.activity[variable], variable))
+        del self.trail[start:]
+        del self.trail_limits[level:]
+        self.head = start
+
+    def _bump(self, variable):
+        self.activity[variable] += self.increment
+        if self.activity[variable] > 1e100:
+            # Rescale before activities overflow
+            self.activity = [value * 1e-100 for value in self.activity]
+            self.increment *= 1e-100
+            self.order = [(-self.activity[v], v)
+                          for v in range(1, self.variables + 1)
+                          if self.values[2 * v] is None]
+            heapq.heapify(self.order)
+            return
+        if self.values[2 * variable] is None:
+            heapq.heappush(self.order,
+                           (-self.activity[variable], variable))
+
+    def _pick(self):
+        """
+        Returns the unassigned variable with the highest activity, or
+        None if every variable is assigned.
+        """
+        while self.order:
+            priority, variable = heapq.heappop(self.order)
+            if (self.values[2 * variable] is None
+                    and -priority == self.activity[variable]):
+                return variable
+        # Stale entries may have hidden some variables
+        for variable in range(1, self.variables + 1):
+            if self.values[2 * variable] is None:
+                return variable
+        return None
+
+
+def _code(literal):
+    return 2 * literal if literal > 0 else -2 * literal + 1